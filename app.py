@@ -1,22 +1,122 @@
+import os
 import sys
 import threading
+import time
 import asyncio
 from pathlib import Path
-from PySide6.QtWidgets import QApplication, QFileDialog
+from PySide6.QtCore import QEvent, QObject, Qt, QTimer
+from PySide6.QtWidgets import QApplication, QFileDialog, QInputDialog
 from ui_main import Ui_MainWindow
-from path_utils import base_path
-from sender import send_batch
+from path_utils import PROFILE_DIR, base_path, playwright_browsers_dir
+from qt_reporter import QtReporter
 
-def run_async_in_thread(coro):
-    """Run given coroutine in a new asyncio loop inside a background thread."""
-    def _target():
+# sender pulls in Playwright (and pandas on first use); it is imported in
+# the background after the window is shown, never on the startup path.
+# Set by bench/startup_bench.py: report the first paint and exit.
+STARTUP_PROBE_ENV = "WBS_STARTUP_PROBE"
+
+class AsyncRunner:
+    """Runs one coroutine as a task on a private asyncio loop in a background
+    thread. Keeps the loop and task so the GUI thread can cancel, pause and
+    resume it; every call is marshalled with call_soon_threadsafe."""
+
+    def __init__(self, make_coro, on_error=None, on_done=None):
+        # make_coro(pause_event) -> coroutine; called on the runner's loop
+        self._make_coro = make_coro
+        self._on_error = on_error
+        self._on_done = on_done
+        self._ready = threading.Event()
+        self.loop = None
+        self.task = None
+        self.pause_event = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._target, daemon=True)
+        self.thread.start()
+        self._ready.wait()
+        return self
+
+    def _target(self):
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
-        loop.run_until_complete(coro)
-        loop.close()
-    t = threading.Thread(target=_target, daemon=True)
-    t.start()
-    return t
+        self.loop = loop
+        # set = running, cleared = paused
+        self.pause_event = asyncio.Event()
+        self.pause_event.set()
+        self.task = loop.create_task(self._make_coro(self.pause_event))
+        self._ready.set()
+        try:
+            loop.run_until_complete(self.task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            if self._on_error:
+                self._on_error(e)
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+            if self._on_done:
+                self._on_done()
+
+    def _call(self, fn):
+        try:
+            self.loop.call_soon_threadsafe(fn)
+        except (AttributeError, RuntimeError):
+            pass  # not started or already finished
+
+    def cancel(self):
+        self._call(lambda: self.task.cancel())
+
+    def pause(self):
+        self._call(lambda: self.pause_event.clear())
+
+    def resume(self):
+        self._call(lambda: self.pause_event.set())
+
+
+def run_async_in_thread(make_coro, on_error=None, on_done=None):
+    """Run make_coro(pause_event) in a new asyncio loop inside a background
+    thread. Returns the AsyncRunner controlling it."""
+    return AsyncRunner(make_coro, on_error, on_done).start()
+
+
+async def run_campaign(**kwargs):
+    """send_batch(**kwargs), importing sender on the runner's thread so a
+    START clicked before warm-up finishes never blocks the GUI."""
+    from sender import send_batch
+    await send_batch(**kwargs)
+
+
+async def run_campaign_queue(**kwargs):
+    """campaigns.run_queue(**kwargs); sender is imported on the runner's
+    thread, as for run_campaign."""
+    from campaigns import run_queue
+    await run_queue(**kwargs)
+
+
+def warm_up():
+    """Import the heavy modules and resolve the Playwright folder in a
+    background thread while the user is still picking files."""
+    def target():
+        try:
+            import sender  # noqa: F401  (Playwright, contacts, ledger...)
+            import pandas  # noqa: F401  (used by pre-flight and templates)
+        except ImportError:
+            pass  # reported properly when a campaign starts
+        playwright_browsers_dir()
+    threading.Thread(target=target, name="warm-up", daemon=True).start()
+
+
+class FirstPaintProbe(QObject):
+    """Prints the wall-clock time of the window's first paint and quits;
+    used by bench/startup_bench.py to time startup."""
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            print(f"FIRST_PAINT {time.time():.6f}", flush=True)
+            obj.removeEventFilter(self)
+            QTimer.singleShot(0, QApplication.quit)
+        return False
 
 class MainApp(Ui_MainWindow):
     def __init__(self):
@@ -29,13 +129,45 @@ class MainApp(Ui_MainWindow):
         self.contacts_btn.clicked.connect(self.pick_contacts)
         self.message_btn.clicked.connect(self.pick_message)
         self.image_btn.clicked.connect(self.pick_image)
+        self.profile_btn.clicked.connect(self.pick_profile)
         self.start_btn.clicked.connect(self.start)
         self.stop_btn.clicked.connect(self.stop)
+        self.pause_btn.clicked.connect(self.toggle_pause)
+        self.opt_out_btn.clicked.connect(self.add_opt_out)
+        self.opt_out_input.returnPressed.connect(self.add_opt_out)
+        self.opt_out_lists_btn.clicked.connect(self.pick_opt_out_lists)
+        self.opt_out_remove_btn.clicked.connect(self.remove_opt_out_list)
+        self.queue_add_btn.clicked.connect(self.add_to_queue)
+        self.queue_remove_btn.clicked.connect(self.remove_from_queue)
+        self.queue_run_btn.clicked.connect(self.run_queue)
+        self.queue_list.itemClicked.connect(self.show_queue)
 
         self._running = False
+        # Sender thread reports through this, never touching widgets directly
+        self.reporter = QtReporter(self)
+        self.reporter.finished.connect(self.on_finished)
+        self.runner = None
+        self._paused = False
+        self.profile_dir = PROFILE_DIR
+        self.profile_lbl.setText(self.profile_dir)
+        # Shared with the running campaign: opt-outs added here apply
+        # before its next send
+        self.suppression = None
+        # Lists to import at the next START; imported lists stay in the
+        # index (suppression/) until removed with "Remove list..."
+        self.opt_out_files = []
+        # Campaign queue (campaigns.db), opened on first use (a click on
+        # the list or a queue button) and refreshed while the queue runs
+        self.campaign_queue = None
+        self.queue_timer = QTimer(self)
+        self.queue_timer.timeout.connect(self.refresh_queue)
+        self.queue_list.addItem('Click to show the saved campaigns')
 
     def pick_contacts(self):
-        f, _ = QFileDialog.getOpenFileName(self, "Select Contacts Excel", "", "Excel Files (*.xlsx)")
+        f, _ = QFileDialog.getOpenFileName(
+            self, "Select Contacts", "",
+            "Contact Files (*.xlsx *.csv *.parquet);;Excel Files (*.xlsx);;CSV Files (*.csv);;Parquet Files (*.parquet)"
+        )
         if f:
             self.contacts_lbl.setText(f)
             self.contacts_file = f
@@ -47,54 +179,230 @@ class MainApp(Ui_MainWindow):
             self.message_file = f
 
     def pick_image(self):
-        f, _ = QFileDialog.getOpenFileName(self, "Select Image", "", "Images (*.jpg *.png *.jpeg)")
-        if f:
-            self.image_lbl.setText(f)
-            self.image_file = f
+        files, _ = QFileDialog.getOpenFileNames(
+            self, "Select Attachments", "",
+            "Attachments (*.jpg *.jpeg *.png *.webp *.gif *.mp4 *.3gp *.mov *.pdf *.doc *.docx *.xlsx);;All Files (*)"
+        )
+        if files:
+            self.image_lbl.setText("; ".join(files))
+            self.image_file = files
+
+    def pick_profile(self):
+        d = QFileDialog.getExistingDirectory(self, "Select Browser Profile Folder", self.profile_dir)
+        if d:
+            self.profile_lbl.setText(d)
+            self.profile_dir = d
+
+    def pick_opt_out_lists(self):
+        files, _ = QFileDialog.getOpenFileNames(
+            self, "Select Opt-out Lists", "",
+            "Contact Files (*.xlsx *.csv);;All Files (*)"
+        )
+        if files:
+            self.opt_out_lbl.setText(f"{len(files)} new opt-out list(s)")
+            self.opt_out_files = files
+
+    def remove_opt_out_list(self):
+        if self._running:
+            self.append_log('Stop the campaign before removing an opt-out list.')
+            return
+        index = self.suppression_index()
+        sources = index.sources()
+        if not sources:
+            self.append_log('No opt-out lists have been imported.')
+            return
+        source, ok = QInputDialog.getItem(
+            self, "Remove Opt-out List",
+            "Numbers from this list will no longer be suppressed\n"
+            "(numbers entered by hand are kept):",
+            sources, 0, False,
+        )
+        if ok and source:
+            index.remove_source(source)
+            self.opt_out_files = [f for f in self.opt_out_files if str(Path(f).resolve()) != source]
+            self.append_log(f'🗑 Removed opt-out list {source}. {index.describe()}')
+
+    def suppression_index(self):
+        """The opt-out index, opened on first use (imports numpy)."""
+        if self.suppression is None:
+            from suppression import SuppressionIndex
+            self.suppression = SuppressionIndex()
+        return self.suppression
+
+    def add_opt_out(self):
+        raw = self.opt_out_input.text().strip()
+        if not raw:
+            return
+        country_code = self.country_code_input.text().strip()
+        try:
+            phone = self.suppression_index().add_opt_out(raw, country_code)
+        except ValueError as e:
+            self.append_log(f'❌ {e}')
+            return
+        self.opt_out_input.clear()
+        self.append_log(f'🚫 {phone} will not be contacted.')
+
+    def campaigns(self):
+        if self.campaign_queue is None:
+            from campaigns import CampaignQueue
+            self.campaign_queue = CampaignQueue()
+        return self.campaign_queue
+
+    def show_queue(self, *_):
+        if self.campaign_queue is None:
+            self.refresh_queue()
+
+    def refresh_queue(self):
+        self.queue_list.clear()
+        for campaign in self.campaigns().campaigns():
+            self.queue_list.addItem(campaign.label())
+            self.queue_list.item(self.queue_list.count() - 1).setData(Qt.UserRole, campaign.id)
+
+    def add_to_queue(self):
+        if getattr(self, 'contacts_file', None) is None:
+            self.append_log('Please select contacts file first.')
+            return
+        msg_file, img_file = self.selected_files()
+        from campaigns import ALL_DAY
+        try:
+            campaign_id = self.campaigns().add(
+                Path(self.contacts_file).stem, self.contacts_file, msg_file, img_file,
+                self.window_input.text().strip() or ALL_DAY,
+            )
+        except ValueError as e:
+            self.append_log(f'❌ {e}')
+            return
+        self.refresh_queue()
+        self.append_log(f'🗂 Queued {self.campaigns().get(campaign_id).label()}')
+
+    def remove_from_queue(self):
+        if self.campaign_queue is None:
+            self.refresh_queue()
+            return
+        item = self.queue_list.currentItem()
+        if item is None:
+            return
+        campaign = self.campaigns().get(item.data(Qt.UserRole))
+        if campaign is not None and campaign.status == "running" and self._running:
+            self.append_log('Stop the queue before removing the running campaign.')
+            return
+        self.campaigns().remove(item.data(Qt.UserRole))
+        self.refresh_queue()
 
     def append_log(self, text):
-        self.log.append(text)
+        self.log.appendPlainText(text)
+
+    def selected_files(self):
+        """(message template, attachments) with the bundled defaults."""
+        msg_file = getattr(self, 'message_file', None) or self.default_message
+        img_file = getattr(self, 'image_file', None)
+        if img_file is None and Path(self.default_image).exists():
+            img_file = self.default_image
+        return msg_file, img_file
+
+    def send_options(self):
+        """send_batch settings from the dashboard, shared by START and the
+        campaign queue."""
+        return dict(
+            gui=self.reporter,
+            daily_limit=int(self.limit_input.value()),
+            min_delay=6.0,
+            max_delay=12.0,
+            auto_pause_every=int(self.pause_every.value()),
+            auto_pause_min=int(self.pause_min.value()),
+            auto_pause_max=int(self.pause_max.value()),
+            skip_delivered=bool(self.skip_delivered_chk.isChecked()),
+            default_country_code=self.country_code_input.text().strip(),
+            profile_dir=self.profile_dir if self.profile_chk.isChecked() else None,
+            suppression=self.suppression_index(),
+            suppression_sources=list(self.opt_out_files),
+        )
 
     def start(self):
         if getattr(self, 'contacts_file', None) is None:
-            self.append_log('Please select contacts Excel file first.')
+            self.append_log('Please select contacts file first.')
             return
-        msg_file = getattr(self, 'message_file', None) or self.default_message
-        img_file = getattr(self, 'image_file', None) or self.default_image
-        limit = int(self.limit_input.value())
-        pause_every = int(self.pause_every.value())
-        pause_min = int(self.pause_min.value())
-        pause_max = int(self.pause_max.value())
+        msg_file, img_file = self.selected_files()
         resume = bool(self.resume_chk.isChecked())
+        options = self.send_options()
 
+        self.run_in_background(lambda pause_event: run_campaign(
+            excel_path=self.contacts_file,
+            template_path=msg_file,
+            image_path=img_file,
+            resume=resume,
+            pause_event=pause_event,
+            **options,
+        ))
+
+    def run_queue(self):
+        if not self.campaigns().pending():
+            self.append_log('The campaign queue is empty; add a campaign first.')
+            return
+        options = self.send_options()
+        self.run_in_background(lambda pause_event: run_campaign_queue(
+            pause_event=pause_event,
+            **options,
+        ))
+        self.queue_timer.start(5000)
+
+    def run_in_background(self, make_coro):
         # disable UI
         self.start_btn.setEnabled(False)
+        self.queue_run_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
+        self.pause_btn.setEnabled(True)
         self._running = True
+        self._paused = False
+        self.pause_btn.setText("PAUSE")
 
-        coro = send_batch(
-            gui=self,
-            excel_path=self.contacts_file,
-            template_path=msg_file,
-            image_path=img_file,
-            daily_limit=limit,
-            min_delay=6.0,
-            max_delay=12.0,
-            auto_pause_every=pause_every,
-            auto_pause_min=pause_min,
-            auto_pause_max=pause_max,
-            resume=resume
+        self.runner = run_async_in_thread(
+            make_coro,
+            on_error=lambda e: self.reporter.append_log(f'❌ Campaign stopped with error: {e}'),
+            on_done=self.reporter.finished.emit,
         )
-        run_async_in_thread(coro)
 
     def stop(self):
-        self.append_log('STOP requested. To fully stop, close browser window. (Graceful cancellation not implemented)')
+        self.append_log('STOP requested. Cancelling campaign...')
         self.stop_btn.setEnabled(False)
-        self.start_btn.setEnabled(True)
+        self.pause_btn.setEnabled(False)
+        self._running = False
+        if self.runner is not None:
+            self.runner.cancel()
+
+    def toggle_pause(self):
+        if self.runner is None:
+            return
+        self._paused = not self._paused
+        if self._paused:
+            self.runner.pause()
+            self.pause_btn.setText("RESUME")
+            self.append_log('PAUSE requested. Pausing before the next contact.')
+        else:
+            self.runner.resume()
+            self.pause_btn.setText("PAUSE")
+
+    def on_finished(self):
+        """Campaign task ended (finished, failed or cancelled)."""
+        self.runner = None
         self._running = False
+        self.queue_timer.stop()
+        if self.campaign_queue is not None:
+            self.refresh_queue()
+        self.start_btn.setEnabled(True)
+        self.queue_run_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        self.pause_btn.setEnabled(False)
+        self.pause_btn.setText("PAUSE")
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     window = MainApp()
+    if os.environ.get(STARTUP_PROBE_ENV):
+        probe = FirstPaintProbe()
+        window.installEventFilter(probe)
+    else:
+        # after the first paint, so it never delays the window
+        QTimer.singleShot(0, warm_up)
     window.show()
     sys.exit(app.exec())
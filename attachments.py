@@ -0,0 +1,129 @@
+import hashlib
+import io
+import mimetypes
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; images are then sent as-is
+    Image = None
+
+ATTACHMENT_CACHE_DIR = "attachment-cache"
+
+# WhatsApp shows these inline (photo/video picker); everything else is
+# sent through the document picker.
+MEDIA_TYPES = ("image/jpeg", "image/png", "image/webp", "image/gif", "video/")
+
+# Formats Pillow re-encodes; GIF/WEBP may be animated, so they are left alone.
+RESIZABLE_IMAGES = {"image/jpeg": "JPEG", "image/png": "PNG"}
+
+
+class Attachment:
+    """
+    A file prepared once per campaign and held in memory.
+    payload() is what page.set_input_files() accepts, so no disk read
+    happens per contact.
+    """
+
+    __slots__ = ("name", "mime_type", "buffer", "sha256", "source")
+
+    def __init__(self, name, mime_type, buffer, sha256, source):
+        self.name = name
+        self.mime_type = mime_type
+        self.buffer = buffer
+        self.sha256 = sha256
+        self.source = source
+
+    @property
+    def kind(self) -> str:
+        return "media" if self.mime_type.startswith(MEDIA_TYPES) else "document"
+
+    def payload(self) -> dict:
+        return {"name": self.name, "mimeType": self.mime_type, "buffer": self.buffer}
+
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _shrink_image(data: bytes, fmt: str, max_side: int, jpeg_quality: int):
+    """
+    Downscale so the longest side is <= max_side and re-encode.
+    Returns None when that would not make the file smaller.
+    """
+    with Image.open(io.BytesIO(data)) as img:
+        if max(img.size) > max_side:
+            img.thumbnail((max_side, max_side))
+        out = io.BytesIO()
+        if fmt == "JPEG":
+            img.convert("RGB").save(out, "JPEG", quality=jpeg_quality, optimize=True)
+        else:
+            img.save(out, "PNG", optimize=True)
+    result = out.getvalue()
+    return result if len(result) < len(data) else None
+
+
+def prepare_attachment(
+    path,
+    cache_dir=ATTACHMENT_CACHE_DIR,
+    max_image_side: int = 0,
+    jpeg_quality: int = 85,
+) -> Attachment:
+    """
+    Hash a file and return it as an in-memory Attachment.
+
+    By default files are sent byte for byte. With max_image_side set,
+    JPEG/PNG images are downscaled/recompressed when Pillow is installed.
+    The processed bytes are cached under cache_dir keyed by the content
+    hash and settings, so later runs skip the image work entirely.
+    """
+    path = Path(path)
+    sha = _file_sha256(path)
+    mime = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    fmt = RESIZABLE_IMAGES.get(mime)
+
+    if fmt is None or Image is None or not max_image_side:
+        return Attachment(path.name, mime, path.read_bytes(), sha, path)
+
+    cache_dir = Path(cache_dir)
+    cached = cache_dir / f"{sha}-{max_image_side}-{jpeg_quality}{path.suffix.lower()}"
+    if cached.exists():
+        return Attachment(path.name, mime, cached.read_bytes(), sha, path)
+
+    data = path.read_bytes()
+    try:
+        shrunk = _shrink_image(data, fmt, max_image_side, jpeg_quality)
+    except Exception:
+        shrunk = None
+    if shrunk is not None:
+        data = shrunk
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = cached.with_suffix(cached.suffix + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(cached)
+    return Attachment(path.name, mime, data, sha, path)
+
+
+def prepare_attachments(paths, **kwargs) -> list:
+    """
+    Prepare several attachments (str, Path or an iterable of them).
+    Missing files raise FileNotFoundError before the browser launches.
+    """
+    if not paths:
+        return []
+    if isinstance(paths, (str, Path)):
+        paths = [paths]
+
+    prepared = []
+    for p in paths:
+        if not p:
+            continue
+        if not Path(p).is_file():
+            raise FileNotFoundError(f"Attachment not found: {p}")
+        prepared.append(prepare_attachment(p, **kwargs))
+    return prepared
@@ -0,0 +1,277 @@
+"""
+Local stand-in for WhatsApp Web, for benchmarks and offline testing.
+
+Serves a tiny chat UI with the selectors send_batch relies on
+(contenteditable composer in #main footer, span[data-icon='clip'],
+hidden input[type=file] elements, span[data-icon='send']) plus
+configurable latency and failure injection. The new-chat button opens a
+search drawer: typing a number lists it, and clicking the result opens
+the chat without a reload, as the real app does.
+
+    python bench/fake_whatsapp.py --port 8765 --chat-latency-ms 300 --fail-rate 0.05
+
+then run send_batch(..., base_url="http://127.0.0.1:8765").
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+DEFAULT_CONFIG = {
+    # server-side delay before any page is returned
+    "page_latency_ms": 0,
+    # time from page load until the logged-in UI appears
+    "login_delay_ms": 100,
+    # time from opening a chat until its composer appears
+    "chat_latency_ms": 200,
+    # chance that a chat never becomes ready (forces the timeout path)
+    "fail_rate": 0.0,
+    # chance that the number is reported as invalid
+    "invalid_rate": 0.0,
+    # time until a sent message gets its single / double tick
+    "ack_ms": 300,
+    # start logged out (QR shown until login_delay_ms passes)
+    "show_qr": True,
+}
+
+PAGE = r"""<!doctype html>
+<html><head><meta charset="utf-8"><title>WhatsApp (stand-in)</title>
+<style>
+body { font-family: sans-serif; margin: 0; display: flex; height: 100vh; }
+#side { width: 30%; border-right: 1px solid #ccc; padding: 8px; }
+#main { flex: 1; display: flex; flex-direction: column; }
+#main .messages { flex: 1; overflow: auto; padding: 8px; }
+#main footer { display: flex; gap: 8px; padding: 8px; border-top: 1px solid #ccc; }
+[contenteditable] { flex: 1; min-height: 1.5em; border: 1px solid #999; padding: 4px; }
+#drawer { position: fixed; top: 0; left: 0; width: 30%; height: 100%; background: #fff;
+          padding: 8px; z-index: 5; }
+#preview { position: fixed; inset: 10% 20%; background: #fff; border: 2px solid #0a0;
+           padding: 12px; display: flex; gap: 8px; z-index: 10; }
+.message-out { background: #dcf8c6; margin: 4px 0; padding: 4px; white-space: pre-wrap; }
+</style></head>
+<body><div id="side"></div>
+<script>
+const CFG = __CONFIG__;
+let msgSeq = 0;
+
+function el(tag, attrs, parent, text) {
+  const e = document.createElement(tag);
+  for (const [k, v] of Object.entries(attrs || {})) e.setAttribute(k, v);
+  if (text) e.textContent = text;
+  if (parent) parent.appendChild(e);
+  return e;
+}
+
+function boot() {
+  const side = document.getElementById("side");
+  const qr = CFG.show_qr ? el("div", {"data-ref": "qr"}, side) : null;
+  if (qr) el("canvas", {"aria-label": "Scan me!", width: 64, height: 64}, qr);
+  setTimeout(() => {
+    if (qr) qr.remove();
+    el("span", {"data-icon": "new-chat-outline", role: "button", title: "New chat"}, side, "✎")
+      .onclick = showNewChat;
+    el("div", {contenteditable: "true", "data-tab": "3", title: "Search"}, side);
+    const phone = new URLSearchParams(location.search).get("phone");
+    if (location.pathname === "/send" && phone) openChat(phone);
+  }, CFG.login_delay_ms);
+}
+
+function openChat(phone) {
+  setTimeout(() => {
+    if (Math.random() < CFG.invalid_rate) {
+      const popup = el("div", {"data-animate-modal-popup": "true", role: "dialog"}, document.body);
+      el("div", {}, popup, "Phone number shared via url is invalid.");
+      el("button", {}, popup, "OK").onclick = () => popup.remove();
+      return;
+    }
+    if (Math.random() < CFG.fail_rate) return;  // chat never becomes ready
+    renderMain(phone);
+  }, CFG.chat_latency_ms);
+}
+
+function closeNewChat() {
+  const drawer = document.getElementById("drawer");
+  if (drawer) drawer.remove();
+}
+
+function showNewChat() {
+  closeNewChat();
+  const drawer = el("div", {id: "drawer"}, document.body);
+  const search = el("div", {contenteditable: "true", "data-tab": "3",
+                            "aria-label": "Search name or number"}, drawer);
+  const results = el("div", {}, drawer);
+  search.addEventListener("input", () => {
+    results.innerHTML = "";
+    const phone = search.innerText.replace(/\D/g, "");
+    if (phone.length < 6) return;
+    const item = el("div", {role: "listitem"}, results, "+" + phone);
+    item.onclick = () => { closeNewChat(); openChat(phone); };
+  });
+  search.focus();
+}
+
+function renderMain(phone) {
+  const old = document.getElementById("main");
+  if (old) old.remove();
+  const main = el("div", {id: "main"}, document.body);
+  el("header", {}, main).appendChild(el("span", {title: phone}, null, phone));
+  main.messages = el("div", {class: "messages"}, main);
+  const footer = el("footer", {}, main);
+  const clip = el("span", {"data-icon": "clip", role: "button"}, footer, "📎");
+  const box = el("div", {contenteditable: "true", "data-tab": "10"}, footer);
+  clip.onclick = () => showFileInputs(phone);
+  wireEditor(box, () => { send(phone, box.innerText, []); box.innerHTML = ""; });
+  box.focus();
+}
+
+function wireEditor(box, onSend) {
+  box.addEventListener("keydown", e => {
+    if (e.key === "Enter" && !e.shiftKey) { e.preventDefault(); onSend(); }
+  });
+  box.addEventListener("paste", e => {
+    e.preventDefault();
+    document.execCommand("insertText", false, e.clipboardData.getData("text/plain"));
+  });
+}
+
+function showFileInputs(phone) {
+  document.querySelectorAll("input[type=file]").forEach(i => i.remove());
+  const media = el("input", {type: "file", multiple: "", style: "display:none",
+                             accept: "image/*,video/mp4,video/3gpp,video/quicktime"}, document.body);
+  const docs = el("input", {type: "file", multiple: "", style: "display:none", accept: "*"}, document.body);
+  for (const input of [media, docs]) {
+    input.onchange = () => showPreview(phone, [...input.files].map(f => f.name));
+  }
+}
+
+function showPreview(phone, files) {
+  const preview = el("div", {id: "preview"});
+  // First in the DOM so the generic caption selector finds it first
+  document.body.insertBefore(preview, document.body.firstChild);
+  el("span", {}, preview, files.join(", "));
+  const caption = el("div", {contenteditable: "true", "data-tab": "10"}, preview);
+  const sendBtn = el("span", {"data-icon": "send", role: "button"}, preview, "➤");
+  const done = () => { send(phone, caption.innerText, files); preview.remove(); };
+  wireEditor(caption, done);
+  sendBtn.onclick = done;
+}
+
+function send(phone, text, files) {
+  const main = document.getElementById("main");
+  const id = `true_${phone}@c.us_${++msgSeq}`;
+  const bubble = el("div", {"data-id": id, class: "message-out"}, main.messages, text);
+  const tick = el("span", {"data-icon": "msg-time"}, bubble);
+  setTimeout(() => tick.setAttribute("data-icon", "msg-check"), CFG.ack_ms);
+  setTimeout(() => tick.setAttribute("data-icon", "msg-dblcheck"), CFG.ack_ms * 2);
+  fetch("/api/sent", {method: "POST", body: JSON.stringify({phone, text, files})});
+}
+
+// Escape closes the invalid-number dialog and the new-chat drawer
+document.addEventListener("keydown", e => {
+  if (e.key !== "Escape") return;
+  document.querySelectorAll("[data-animate-modal-popup]").forEach(p => p.remove());
+  closeNewChat();
+});
+
+boot();
+</script></body></html>
+"""
+
+
+class FakeWhatsApp:
+    """
+    Threaded HTTP server with the stand-in page and a tiny API:
+    POST /api/sent (called by the page), GET /api/stats.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, **config):
+        self.config = {**DEFAULT_CONFIG, **config}
+        self.sent = []
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, code, body: bytes, ctype):
+                self.send_response(code)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if path in ("/", "/send"):
+                    time.sleep(server.config["page_latency_ms"] / 1000)
+                    page = PAGE.replace("__CONFIG__", json.dumps(server.config))
+                    self._reply(200, page.encode("utf-8"), "text/html; charset=utf-8")
+                elif path == "/api/stats":
+                    with server._lock:
+                        stats = {"sent": len(server.sent), "last": server.sent[-5:]}
+                    self._reply(200, json.dumps(stats).encode(), "application/json")
+                else:
+                    self._reply(404, b"not found", "text/plain")
+
+            def do_POST(self):
+                if urlparse(self.path).path != "/api/sent":
+                    self._reply(404, b"not found", "text/plain")
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    msg = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    msg = {}
+                with server._lock:
+                    server.sent.append(msg)
+                self._reply(204, b"", "text/plain")
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--page-latency-ms", type=int, default=DEFAULT_CONFIG["page_latency_ms"])
+    ap.add_argument("--login-delay-ms", type=int, default=DEFAULT_CONFIG["login_delay_ms"])
+    ap.add_argument("--chat-latency-ms", type=int, default=DEFAULT_CONFIG["chat_latency_ms"])
+    ap.add_argument("--fail-rate", type=float, default=DEFAULT_CONFIG["fail_rate"])
+    ap.add_argument("--invalid-rate", type=float, default=DEFAULT_CONFIG["invalid_rate"])
+    ap.add_argument("--ack-ms", type=int, default=DEFAULT_CONFIG["ack_ms"])
+    ap.add_argument("--no-qr", dest="show_qr", action="store_false")
+    args = ap.parse_args()
+
+    config = {k: v for k, v in vars(args).items() if k in DEFAULT_CONFIG}
+    server = FakeWhatsApp(args.host, args.port, **config).start()
+    print(f"WhatsApp stand-in listening on {server.url} (Ctrl+C to stop)")
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
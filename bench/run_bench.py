@@ -0,0 +1,245 @@
+"""
+Benchmark send_batch against the local WhatsApp stand-in.
+
+For each contact-file size it reports startup time (send_batch call to
+first send), per-contact latency (p50 / p95 / mean from the timing trace),
+throughput, and memory (peak RSS; Python heap peak with --tracemalloc).
+Every size runs in a fresh subprocess so memory numbers do not mix.
+
+    python bench/run_bench.py --rows 1000,100000,1000000 --send 50
+    python bench/run_bench.py --url http://127.0.0.1:8765   # external stand-in
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+
+# ------------- SYNTHETIC CONTACTS -------------
+
+
+def make_contacts(path: Path, rows: int, fmt: str) -> Path:
+    """
+    Write `rows` synthetic contacts (name, phone, city) in csv/xlsx/parquet.
+    Files are cached by name, so repeated runs reuse them.
+    """
+    path = path.with_suffix(f".{fmt}")
+    if path.exists():
+        return path
+
+    def gen():
+        for n in range(rows):
+            yield (f"Contact {n}", f"+91 9{n:09d}", ("Pune", "Delhi", "Goa")[n % 3])
+
+    header = ("name", "phone", "city")
+    if fmt == "csv":
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(header)
+            w.writerows(gen())
+    elif fmt == "xlsx":
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(header)
+        for row in gen():
+            ws.append(row)
+        wb.save(path)
+    else:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        names, phones, cities = zip(*gen()) if rows else ((), (), ())
+        table = pa.table({"name": names, "phone": phones, "city": cities})
+        pq.write_table(table, path, row_group_size=65536)
+    return path
+
+
+# ------------- ONE RUN (child process) -------------
+
+
+class BenchReporter:
+    """
+    Reporter that only timestamps the events the benchmark needs.
+    """
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        self.first_send_at = None
+
+    def append_log(self, msg):
+        if self.first_send_at is None and msg.startswith("➡ Sending"):
+            self.first_send_at = time.monotonic()
+        if self.verbose:
+            print(msg, file=sys.stderr)
+
+    def set_progress(self, value):
+        pass
+
+    def set_maximum(self, maximum):
+        pass
+
+    def set_status(self, text):
+        pass
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        return None
+
+
+def run_once(args) -> dict:
+    from sender import send_batch
+
+    if args.tracemalloc:
+        import tracemalloc
+
+        tracemalloc.start()
+
+    work = Path(tempfile.mkdtemp(prefix="wbs-bench-"))
+    os.chdir(work)  # state.json, ledger, trace land here
+    template = work / "message.txt"
+    template.write_text("Hi {{name|first}} from {{city|default:here}}!\nLine two 🚀", encoding="utf-8")
+
+    server = None
+    url = args.url
+    if not url:
+        from fake_whatsapp import FakeWhatsApp
+
+        server = FakeWhatsApp(
+            show_qr=False,
+            login_delay_ms=args.login_delay_ms,
+            chat_latency_ms=args.chat_latency_ms,
+            fail_rate=args.fail_rate,
+        ).start()
+        url = server.url
+
+    reporter = BenchReporter(args.verbose)
+    started = time.monotonic()
+    asyncio.run(
+        send_batch(
+            gui=reporter,
+            excel_path=args.contacts,
+            template_path=str(template),
+            image_path=None,
+            daily_limit=args.send,
+            min_delay=0,
+            max_delay=0,
+            auto_pause_every=0,
+            resume=False,
+            max_retries_per_contact=2,
+            base_url=url,
+            headless=not args.headed,
+            navigation=args.navigation,
+            trace_path=str(work / "trace.jsonl"),
+            metrics_path=None,
+        )
+    )
+    total_s = time.monotonic() - started
+    if server is not None:
+        server.stop()
+
+    latencies = []
+    with open(work / "trace.jsonl", encoding="utf-8") as f:
+        for line in f:
+            rec = json.loads(line)
+            if rec["stage"] == "contact":
+                latencies.append(rec["seconds"])
+    latencies.sort()
+
+    def pct(q):
+        return latencies[min(int(q * len(latencies)), len(latencies) - 1)] if latencies else None
+
+    result = {
+        "contacts_sent": len(latencies),
+        "startup_s": (reporter.first_send_at - started) if reporter.first_send_at else None,
+        "total_s": total_s,
+        "p50_s": pct(0.5),
+        "p95_s": pct(0.95),
+        "mean_s": sum(latencies) / len(latencies) if latencies else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    if args.tracemalloc:
+        result["py_heap_peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    return result
+
+
+# ------------- DRIVER -------------
+
+
+def _fmt(v, spec=".2f"):
+    return "-" if v is None else format(v, spec)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", default="1000,10000,100000,1000000",
+                    help="comma-separated contact-file sizes")
+    ap.add_argument("--format", default="csv", choices=("csv", "xlsx", "parquet"))
+    ap.add_argument("--send", type=int, default=25, help="contacts actually sent per run")
+    ap.add_argument("--url", default=None, help="stand-in URL (default: start one locally)")
+    ap.add_argument("--chat-latency-ms", type=int, default=200)
+    ap.add_argument("--login-delay-ms", type=int, default=100)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--navigation", default="in_app", choices=("in_app", "reload"))
+    ap.add_argument("--data-dir", default=str(Path(tempfile.gettempdir()) / "wbs-bench-data"))
+    ap.add_argument("--tracemalloc", action="store_true", help="also report Python heap peak (slower)")
+    ap.add_argument("--headed", action="store_true")
+    ap.add_argument("--verbose", action="store_true")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--contacts", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(run_once(args)))
+        return
+
+    data_dir = Path(args.data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    passthrough = []
+    argv = iter(sys.argv[1:])
+    for a in argv:
+        if a == "--rows":
+            next(argv, None)
+        elif not a.startswith("--rows="):
+            passthrough.append(a)
+
+    print(f"{'rows':>9} {'sent':>5} {'startup':>8} {'p50':>7} {'p95':>7} {'mean':>7} {'total':>8} {'rss MB':>8}")
+    for rows in (int(r) for r in args.rows.split(",") if r.strip()):
+        contacts = make_contacts(data_dir / f"contacts_{rows}", rows, args.format)
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", "--contacts", str(contacts), *passthrough],
+            capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            print(f"{rows:>9} FAILED\n{out.stderr}")
+            continue
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(
+            f"{rows:>9} {r['contacts_sent']:>5} {_fmt(r['startup_s']):>8} {_fmt(r['p50_s']):>7} "
+            f"{_fmt(r['p95_s']):>7} {_fmt(r['mean_s']):>7} {_fmt(r['total_s']):>8} "
+            f"{_fmt(r['peak_rss_mb'], '.0f'):>8}"
+            + (f"  heap {r['py_heap_peak_mb']:.0f} MB" if "py_heap_peak_mb" in r else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Measure GUI startup: process launch to the window's first paint.
+
+The app is started with WBS_STARTUP_PROBE=1, prints the wall time of its
+first paint and exits. Runs script mode (python app.py) and, with --exe,
+the frozen build (dist/app.exe, which includes the one-file unpack).
+Also times a cold `import sender`, i.e. what the background warm-up
+takes off the startup path.
+
+    python bench/startup_bench.py --runs 5
+    python bench/startup_bench.py --exe dist/app.exe
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+def time_to_first_paint(cmd, timeout=120):
+    env = {**os.environ, "WBS_STARTUP_PROBE": "1"}
+    started = time.time()
+    out = subprocess.run(
+        cmd, cwd=REPO, env=env, capture_output=True, text=True, timeout=timeout
+    )
+    for line in out.stdout.splitlines():
+        if line.startswith("FIRST_PAINT "):
+            return float(line.split()[1]) - started
+    raise RuntimeError(f"{cmd[0]} exited without painting:\n{out.stderr[-2000:]}")
+
+
+def time_import(module):
+    started = time.time()
+    subprocess.run(
+        [sys.executable, "-c", f"import {module}"], cwd=REPO, check=True, capture_output=True
+    )
+    return time.time() - started
+
+
+def report(label, samples):
+    print(
+        f"{label:<22} median {statistics.median(samples):6.2f}s  "
+        f"min {min(samples):6.2f}s  max {max(samples):6.2f}s  (n={len(samples)})"
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--exe", help="frozen build to time as well (e.g. dist/app.exe)")
+    args = ap.parse_args()
+
+    report(
+        "script first paint",
+        [time_to_first_paint([sys.executable, "app.py"]) for _ in range(args.runs)],
+    )
+    if args.exe:
+        exe = str(Path(args.exe).resolve())
+        report("frozen first paint", [time_to_first_paint([exe]) for _ in range(args.runs)])
+    report("import sender (bg)", [time_import("sender") for _ in range(args.runs)])
+    report("python baseline", [time_import("sys") for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import time
+
+from reporter import gui_append
+
+# Resource types the send flow never needs (downloads only; attachment
+# uploads are fetch/xhr requests)
+BLOCKED_RESOURCE_TYPES = ("font", "media")
+# Profile-picture host; only its image GETs are blocked. The media host
+# (mmg.whatsapp.net) also carries attachment uploads and is left alone.
+BLOCKED_URL_PARTS = ("pps.whatsapp.net",)
+
+
+class ResourceManager:
+    """
+    Keeps Chromium's footprint flat over long campaigns.
+
+    - sample(): JS heap, DOM node count and renderer busy time of the
+      page via CDP Performance.getMetrics
+    - maybe_recycle(): replaces the tab with a fresh one (new renderer
+      process, empty JS heap) every `recycle_every` contacts or when the JS
+      heap exceeds `heap_limit_mb`. The context, and so the login, is kept;
+      recycling the context itself would log a non-persistent session out.
+    - install(): optionally aborts fonts, media and avatar requests
+    """
+
+    def __init__(
+        self,
+        context,
+        gui=None,
+        recycle_every: int = 200,
+        heap_limit_mb: float = 400.0,
+        sample_every: int = 10,
+        block_resources: bool = False,
+        metrics=None,
+    ):
+        self.context = context
+        self.gui = gui
+        self.recycle_every = recycle_every
+        self.heap_limit_mb = heap_limit_mb
+        self.sample_every = max(int(sample_every), 1)
+        self.block_resources = block_resources
+        self.metrics = metrics
+        self.since_recycle = 0
+        self.recycles = 0
+        self.last_sample = {}
+        self._cdp = None
+        self._cdp_page = None
+
+    def _log(self, msg):
+        if self.gui is not None:
+            gui_append(self.gui, msg)
+
+    # ---- request blocking ----
+
+    async def install(self):
+        if self.block_resources:
+            await self.context.route("**/*", self._route)
+
+    async def _route(self, route):
+        request = route.request
+        if request.method != "GET":
+            # Never an upload
+            await route.continue_()
+        elif request.resource_type in BLOCKED_RESOURCE_TYPES or (
+            request.resource_type == "image"
+            and any(part in request.url for part in BLOCKED_URL_PARTS)
+        ):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    # ---- sampling ----
+
+    async def sample(self, page) -> dict:
+        """
+        Current page metrics: js_heap_mb, js_heap_total_mb, dom_nodes,
+        busy_seconds (cumulative renderer task time, a CPU proxy).
+        """
+        try:
+            if self._cdp is None or self._cdp_page is not page:
+                self._cdp = await self.context.new_cdp_session(page)
+                self._cdp_page = page
+                await self._cdp.send("Performance.enable")
+            raw = await self._cdp.send("Performance.getMetrics")
+        except Exception:
+            return {}
+        m = {item["name"]: item["value"] for item in raw.get("metrics", [])}
+        self.last_sample = {
+            "js_heap_mb": m.get("JSHeapUsedSize", 0) / (1024 * 1024),
+            "js_heap_total_mb": m.get("JSHeapTotalSize", 0) / (1024 * 1024),
+            "dom_nodes": int(m.get("Nodes", 0)),
+            "busy_seconds": m.get("TaskDuration", 0.0),
+        }
+        if self.metrics is not None:
+            for name, value in self.last_sample.items():
+                self.metrics.set_gauge(f"browser_{name}", value)
+        return self.last_sample
+
+    # ---- recycling ----
+
+    async def maybe_recycle(self, page, reopen, contact=None):
+        """
+        Call once per contact. Returns the page to use from now on: the
+        same one, or a fresh tab opened with `await reopen(new_page)`.
+        """
+        self.since_recycle += 1
+
+        reason = None
+        if self.recycle_every and self.since_recycle >= self.recycle_every:
+            reason = f"{self.since_recycle} contacts since last recycle"
+        elif self.since_recycle % self.sample_every == 0:
+            sample = await self.sample(page)
+            heap = sample.get("js_heap_mb", 0)
+            if self.heap_limit_mb and heap > self.heap_limit_mb:
+                reason = f"JS heap {heap:.0f} MB > {self.heap_limit_mb:.0f} MB"
+
+        if reason is None:
+            return page
+
+        started = time.monotonic()
+        new_page = await self.context.new_page()
+        try:
+            await reopen(new_page)
+        except Exception as e:
+            self._log(f"⚠ Tab recycle failed ({e}); keeping the current tab.")
+            await new_page.close()
+            self.since_recycle = 0
+            return page
+
+        try:
+            await page.close()
+        except Exception:
+            pass
+        self._cdp = None
+        self._cdp_page = None
+        self.since_recycle = 0
+        self.recycles += 1
+        if self.metrics is not None:
+            self.metrics.observe("recycle", time.monotonic() - started, contact)
+            self.metrics.set_gauge("browser_recycles", self.recycles)
+        self._log(
+            f"♻ Recycled browser tab ({reason}) in {time.monotonic() - started:.1f}s."
+        )
+        return new_page
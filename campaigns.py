@@ -0,0 +1,520 @@
+"""
+Campaign queue: several contact lists, each with its own template,
+attachments and sending hours, run one after another within one shared
+daily limit.
+
+    python campaigns.py add "October promo" contacts.xlsx --template message.txt \\
+        --attach image.jpg --window 09:00-18:00
+    python campaigns.py list
+    python campaigns.py remove 3
+    python campaigns.py run settings.json --set daily_limit=200
+
+settings.json holds the send_batch arguments shared by every campaign
+(daily_limit, pacing, profile_dir, headless...); `run` streams JSON lines
+like cli.py and returns when the queue is empty.
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import sqlite3
+import sys
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import NamedTuple
+
+from ledger import LEDGER_FILE, DeliveryLedger
+from reporter import gui_append
+
+CAMPAIGNS_FILE = "campaigns.db"
+# One progress journal per campaign (send_batch state_path)
+CAMPAIGN_STATE_DIR = "campaign-state"
+
+# queued -> running -> done; "failed" stops the campaign until re-queued
+STATUSES = ("queued", "running", "done", "failed")
+# Start == end means the whole day
+ALL_DAY = "00:00-00:00"
+
+# Longest single sleep while waiting for a window / the next day, so a
+# STOP or a campaign added meanwhile is noticed
+POLL_SECONDS = 60.0
+
+# send_batch arguments a campaign row or the scheduler always sets
+CAMPAIGN_KEYS = (
+    "gui", "excel_path", "template_path", "image_path", "daily_limit",
+    "state_path", "stop_at", "resume", "pause_event",
+)
+
+
+class Campaign(NamedTuple):
+    id: int
+    name: str
+    excel_path: str
+    template_path: str
+    attachments: list
+    window: str
+    status: str
+    options: dict
+    last_error: str = None
+
+    def label(self) -> str:
+        hours = "all day" if self.window == ALL_DAY else self.window
+        return f"#{self.id} {self.name} [{self.status}] {Path(self.excel_path).name}, {hours}"
+
+
+# ------------- SENDING WINDOWS -------------
+
+
+def parse_window(text: str):
+    """
+    "09:00-18:00" -> (time(9), time(18)). The end may be before the start
+    for windows past midnight ("20:00-02:00").
+    """
+    try:
+        start, end = (time.fromisoformat(part.strip()) for part in text.split("-"))
+    except ValueError:
+        raise ValueError(f"Sending window must look like 09:00-18:00, got {text!r}") from None
+    return start, end
+
+
+def window_bounds(window: str, now: datetime):
+    """
+    (opens, closes) of the window containing `now`, or of the next one.
+    """
+    start, end = parse_window(window)
+    if start == end:
+        day = datetime.combine(now.date(), time())
+        return day, day + timedelta(days=1)
+    opens = datetime.combine(now.date(), start)
+    closes = datetime.combine(now.date(), end)
+    if closes <= opens:
+        closes += timedelta(days=1)
+        # Still inside yesterday's overnight window?
+        if now < closes - timedelta(days=1):
+            return opens - timedelta(days=1), closes - timedelta(days=1)
+    if now >= closes:
+        opens, closes = opens + timedelta(days=1), closes + timedelta(days=1)
+    return opens, closes
+
+
+# ------------- QUEUE -------------
+
+
+class CampaignQueue:
+    """
+    Campaigns in a small SQLite file, in the order they were added.
+    Each campaign resumes from its own journal in CAMPAIGN_STATE_DIR.
+    """
+
+    def __init__(self, path=CAMPAIGNS_FILE, state_dir=CAMPAIGN_STATE_DIR):
+        self.path = str(path)
+        self.state_dir = Path(state_dir)
+        # The GUI reads the queue while the scheduler thread updates it
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS campaigns (
+                id            INTEGER PRIMARY KEY,
+                name          TEXT NOT NULL,
+                excel_path    TEXT NOT NULL,
+                template_path TEXT,
+                attachments   TEXT NOT NULL DEFAULT '[]',
+                window        TEXT NOT NULL DEFAULT '00:00-00:00',
+                options       TEXT NOT NULL DEFAULT '{}',
+                status        TEXT NOT NULL DEFAULT 'queued',
+                last_error    TEXT,
+                created_at    TEXT NOT NULL,
+                updated_at    TEXT NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def add(
+        self,
+        name: str,
+        excel_path,
+        template_path=None,
+        image_path=None,
+        window: str = ALL_DAY,
+        options: dict = None,
+    ) -> int:
+        """
+        Queue a campaign; `options` are extra send_batch arguments for it
+        (e.g. {"default_country_code": "91"}).
+        """
+        parse_window(window)
+        options = dict(options or {})
+        reserved = sorted(k for k in options if k in CAMPAIGN_KEYS)
+        if reserved:
+            raise ValueError(f"Set by the campaign itself: {', '.join(reserved)}")
+        if isinstance(image_path, (str, Path)):
+            image_path = [image_path]
+        now = datetime.now().isoformat(timespec="seconds")
+        cur = self.conn.execute(
+            """
+            INSERT INTO campaigns
+                (name, excel_path, template_path, attachments, window, options,
+                 created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                name,
+                str(Path(excel_path).resolve()),
+                str(Path(template_path).resolve()) if template_path else None,
+                json.dumps([str(Path(p).resolve()) for p in image_path or ()]),
+                window,
+                json.dumps(options),
+                now,
+                now,
+            ),
+        )
+        self.conn.commit()
+        return cur.lastrowid
+
+    @staticmethod
+    def _campaign(row) -> Campaign:
+        return Campaign(
+            row[0], row[1], row[2], row[3], json.loads(row[4]), row[5],
+            row[7], json.loads(row[6]), row[8],
+        )
+
+    def get(self, campaign_id: int):
+        row = self.conn.execute(
+            "SELECT * FROM campaigns WHERE id = ?", (campaign_id,)
+        ).fetchone()
+        return self._campaign(row) if row else None
+
+    def campaigns(self) -> list:
+        return [
+            self._campaign(row)
+            for row in self.conn.execute("SELECT * FROM campaigns ORDER BY id")
+        ]
+
+    def pending(self) -> list:
+        """
+        Campaigns still to run, oldest first ("running" ones were
+        interrupted and resume).
+        """
+        return [c for c in self.campaigns() if c.status in ("queued", "running")]
+
+    def set_status(self, campaign_id: int, status: str, error: str = None) -> None:
+        if status not in STATUSES:
+            raise ValueError(f"status must be one of: {', '.join(STATUSES)}")
+        self.conn.execute(
+            "UPDATE campaigns SET status = ?, last_error = ?, updated_at = ? WHERE id = ?",
+            (status, error, datetime.now().isoformat(timespec="seconds"), campaign_id),
+        )
+        self.conn.commit()
+
+    def remove(self, campaign_id: int) -> None:
+        self.conn.execute("DELETE FROM campaigns WHERE id = ?", (campaign_id,))
+        self.conn.commit()
+
+    def state_path(self, campaign_id: int) -> Path:
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        return self.state_dir / f"campaign-{campaign_id}.json"
+
+    def close(self) -> None:
+        try:
+            self.conn.close()
+        except sqlite3.Error:
+            pass
+
+
+# ------------- SCHEDULER -------------
+
+
+class CampaignScheduler:
+    """
+    Runs the queue: the first pending campaign whose window is open is sent
+    with send_batch until its list ends, its window closes or the day's
+    limit is used up; then the next one. Outside every window, or once the
+    limit is reached, it sleeps until the next window opens / midnight.
+
+    The daily limit is shared: sends of every campaign today are counted
+    in the ledger. While a campaign runs, the next one's contacts are
+    parsed into the contacts cache and its attachments prepared, so it
+    starts without delay.
+    """
+
+    def __init__(self, queue: CampaignQueue, gui, daily_limit: int = 300, **send_options):
+        self.queue = queue
+        self.gui = gui
+        self.daily_limit = daily_limit
+        # Shared send_batch arguments; a campaign's own options win
+        self.send_options = send_options
+        self._prepared = {}
+
+    def _log(self, msg):
+        gui_append(self.gui, msg)
+
+    def _options(self, campaign: Campaign) -> dict:
+        return {**self.send_options, **campaign.options}
+
+    def prepare(self, campaign: Campaign):
+        """
+        Parse/cache the contacts and prepare the attachments (blocking;
+        run in a worker thread). Returns the contacts_cache.Contacts.
+        """
+        from attachments import prepare_attachments
+        from contacts_cache import CONTACTS_CACHE_DIR, load_contacts
+
+        options = self._options(campaign)
+        contacts = load_contacts(
+            campaign.excel_path,
+            options.get("default_country_code", ""),
+            options.get("contacts_cache", CONTACTS_CACHE_DIR),
+        )
+        if campaign.attachments:
+            prepare_attachments(
+                campaign.attachments, max_image_side=options.get("max_image_side", 0)
+            )
+        return contacts
+
+    def _prefetch(self, campaign: Campaign):
+        if campaign.id not in self._prepared:
+            self._prepared[campaign.id] = asyncio.get_running_loop().create_task(
+                asyncio.to_thread(self.prepare, campaign)
+            )
+        return self._prepared[campaign.id]
+
+    def _sent_today(self, ledger, state_path):
+        """
+        (sent today by every campaign, from the ledger; sent today by this
+        campaign, from its journal, the count send_batch checks its
+        daily_limit against)
+        """
+        from sender import load_state
+
+        total = ledger.sent_since(datetime.combine(date.today(), time()))
+        state = load_state(state_path)
+        own = state.get("sent_today", 0) if state.get("last_sent_date") == str(date.today()) else 0
+        return total, own
+
+    async def _sleep_until(self, when: datetime):
+        from sender import should_stop
+
+        while datetime.now() < when and not should_stop(self.gui):
+            seconds = (when - datetime.now()).total_seconds()
+            await asyncio.sleep(max(0.0, min(seconds, POLL_SECONDS)))
+
+    async def run(self, pause_event=None) -> bool:
+        """
+        Returns True when the queue is empty (or STOP was pressed), False
+        when the browser could not start, login timed out or the connection
+        was lost (the campaign stays queued).
+        """
+        from sender import load_state, send_batch, should_stop
+
+        ledger = DeliveryLedger(self.send_options.get("ledger_path", LEDGER_FILE))
+        try:
+            while not should_stop(self.gui):
+                if pause_event is not None and not pause_event.is_set():
+                    await pause_event.wait()
+
+                pending = self.queue.pending()
+                if not pending:
+                    self._log("🏁 Campaign queue is empty.")
+                    return True
+
+                now = datetime.now()
+                open_now = [c for c in pending if window_bounds(c.window, now)[0] <= now]
+                if not open_now:
+                    wake = min(window_bounds(c.window, now)[0] for c in pending)
+                    self._log(f"🕒 No sending window open; next one at {wake:%a %H:%M}.")
+                    self._prefetch(pending[0])
+                    await self._sleep_until(wake)
+                    continue
+
+                campaign = open_now[0]
+                state_path = self.queue.state_path(campaign.id)
+                sent_all, sent_own = self._sent_today(ledger, state_path)
+                if sent_all >= self.daily_limit:
+                    tomorrow = datetime.combine(date.today() + timedelta(days=1), time())
+                    self._log(
+                        f"⏸ Daily limit {self.daily_limit} reached across campaigns; "
+                        "resuming tomorrow."
+                    )
+                    await self._sleep_until(tomorrow)
+                    continue
+
+                try:
+                    contacts = await self._prefetch(campaign)
+                except Exception as e:
+                    self.queue.set_status(campaign.id, "failed", str(e))
+                    self._log(f"❌ Campaign {campaign.label()} cannot start: {e}")
+                    continue
+                self._prepared.pop(campaign.id, None)
+                # Get the next campaign ready while this one sends
+                following = [c for c in pending if c.id != campaign.id]
+                if following:
+                    self._prefetch(following[0])
+
+                self._log(f"📣 Starting campaign {campaign.label()}")
+                self.queue.set_status(campaign.id, "running")
+                started_at_index = load_state(state_path).get("last_index", 0)
+                _, closes = window_bounds(campaign.window, now)
+                try:
+                    ok = await send_batch(
+                        **self._options(campaign),
+                        gui=self.gui,
+                        excel_path=campaign.excel_path,
+                        template_path=campaign.template_path,
+                        image_path=campaign.attachments or None,
+                        # send_batch counts on from its journal's sent_today;
+                        # what is left of the shared limit goes on top
+                        daily_limit=max(
+                            0, min(self.daily_limit, sent_own + self.daily_limit - sent_all)
+                        ),
+                        state_path=state_path,
+                        stop_at=closes if campaign.window != ALL_DAY else None,
+                        resume=True,
+                        pause_event=pause_event,
+                    )
+                except asyncio.CancelledError:
+                    self.queue.set_status(campaign.id, "queued")
+                    raise
+                except Exception as e:
+                    self.queue.set_status(campaign.id, "failed", str(e))
+                    self._log(f"❌ Campaign {campaign.label()} failed: {e}")
+                    continue
+
+                if not ok:
+                    self.queue.set_status(
+                        campaign.id, "queued", "browser launch, login or connection failed"
+                    )
+                    return False
+                last_index = load_state(state_path).get("last_index", 0)
+                now = datetime.now()
+                if last_index >= contacts.total:
+                    self.queue.set_status(campaign.id, "done")
+                    self._log(f"✅ Campaign {campaign.name} finished.")
+                elif (
+                    last_index == started_at_index
+                    and not should_stop(self.gui)
+                    and window_bounds(campaign.window, now)[0] <= now
+                    and self._sent_today(ledger, state_path)[0] < self.daily_limit
+                ):
+                    # Stopped without progress inside its window (e.g. logged
+                    # out and not restored): do not restart it in a loop
+                    self.queue.set_status(campaign.id, "failed", "stopped without progress")
+                    self._log(f"❌ Campaign {campaign.label()} stopped without progress.")
+                else:
+                    self.queue.set_status(campaign.id, "queued")
+            return True
+        finally:
+            for task in self._prepared.values():
+                task.cancel()
+            self._prepared.clear()
+            ledger.close()
+
+
+async def run_queue(gui, pause_event=None, campaigns_path=CAMPAIGNS_FILE, **send_options):
+    """
+    Open the queue and run it; the GUI and `campaigns.py run` entry point.
+    """
+    queue = CampaignQueue(campaigns_path)
+    try:
+        scheduler = CampaignScheduler(queue, gui, **send_options)
+        return await scheduler.run(pause_event)
+    finally:
+        queue.close()
+
+
+# ------------- COMMAND LINE -------------
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--db", default=CAMPAIGNS_FILE, help="campaign queue file")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    add = sub.add_parser("add", help="queue a campaign")
+    add.add_argument("name")
+    add.add_argument("contacts", help="contacts file (.xlsx, .csv, .parquet)")
+    add.add_argument("--template", help="message template file")
+    add.add_argument("--attach", action="append", default=[], help="attachment (repeatable)")
+    add.add_argument("--window", default=ALL_DAY, help="sending hours, e.g. 09:00-18:00")
+    add.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                     help="send_batch option for this campaign (repeatable)")
+
+    sub.add_parser("list", help="show the queue")
+    rm = sub.add_parser("remove", help="delete a campaign")
+    rm.add_argument("id", type=int)
+    requeue = sub.add_parser("requeue", help="queue a failed or finished campaign again")
+    requeue.add_argument("id", type=int)
+
+    run = sub.add_parser("run", help="run the queue until it is empty")
+    run.add_argument("config", help="JSON file with shared send_batch arguments")
+    run.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                     help="override one config value (repeatable)")
+    args = ap.parse_args(argv)
+
+    from cli import load_config
+    from reporter import JsonLinesReporter
+
+    if args.command == "run":
+        from sender import send_batch
+
+        reporter = JsonLinesReporter()
+        try:
+            config = load_config(args.config, args.set)
+            params = inspect.signature(send_batch).parameters
+            unknown = sorted(
+                k for k in config
+                if k not in params or (k in CAMPAIGN_KEYS and k != "daily_limit")
+            )
+            if unknown:
+                raise ValueError(f"Unknown or per-campaign config keys: {', '.join(unknown)}")
+        except (OSError, ValueError) as e:
+            reporter.done(False, f"config: {e}")
+            return 2
+        try:
+            ok = asyncio.run(run_queue(reporter, campaigns_path=args.db, **config))
+        except KeyboardInterrupt:
+            reporter.done(False, "cancelled")
+            return 130
+        except Exception as e:
+            reporter.done(False, str(e))
+            return 1
+        reporter.done(ok, None if ok else "browser launch or login failed (see log)")
+        return 0 if ok else 1
+
+    queue = CampaignQueue(args.db)
+    try:
+        if args.command == "add":
+            options = {}
+            for item in args.set:
+                key, sep, value = item.partition("=")
+                if not sep:
+                    ap.error(f"--set expects key=value, got {item!r}")
+                try:
+                    options[key.strip()] = json.loads(value)
+                except ValueError:
+                    options[key.strip()] = value
+            try:
+                campaign_id = queue.add(
+                    args.name, args.contacts, args.template, args.attach, args.window, options
+                )
+            except ValueError as e:
+                print(e, file=sys.stderr)
+                return 2
+            print(queue.get(campaign_id).label())
+        elif args.command == "list":
+            for campaign in queue.campaigns():
+                print(campaign.label() + (f" - {campaign.last_error}" if campaign.last_error else ""))
+        elif args.command == "remove":
+            queue.remove(args.id)
+        elif args.command == "requeue":
+            queue.set_status(args.id, "queued")
+    finally:
+        queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Run a campaign without the desktop app, e.g. from a scheduled job.
+
+    python cli.py campaign.json
+    python cli.py campaign.json --set daily_limit=50 --set headless=true
+
+The config file is a JSON object of send_batch arguments:
+
+    {
+      "excel_path": "contacts.xlsx",
+      "template_path": "message.txt",
+      "image_path": ["image.jpg"],
+      "daily_limit": 200,
+      "profile_dir": "browser-profile",
+      "headless": true
+    }
+
+Progress is streamed to stdout as JSON lines (see reporter.JsonLinesReporter);
+the last line is {"type": "done", "ok": ...}. Ctrl+C cancels the campaign
+with progress saved. Exit status: 0 done, 1 failed, 2 bad config, 130 cancelled.
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import sys
+from pathlib import Path
+
+from reporter import JsonLinesReporter
+
+# Config keys the CLI supplies itself
+RESERVED = ("gui", "pause_event")
+
+
+def load_config(path, overrides=()) -> dict:
+    """
+    Read the JSON config and apply `key=value` overrides (values parsed as
+    JSON when possible, else kept as strings).
+    """
+    config = json.loads(Path(path).read_text(encoding="utf-8"))
+    if not isinstance(config, dict):
+        raise ValueError(f"{path}: expected a JSON object of send_batch arguments")
+    for item in overrides:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"--set expects key=value, got {item!r}")
+        try:
+            config[key.strip()] = json.loads(value)
+        except ValueError:
+            config[key.strip()] = value
+    return config
+
+
+def check_config(config: dict, send_batch) -> None:
+    params = inspect.signature(send_batch).parameters
+    unknown = sorted(k for k in config if k not in params or k in RESERVED)
+    if unknown:
+        raise ValueError(f"Unknown config keys: {', '.join(unknown)}")
+    missing = sorted(
+        name
+        for name, p in params.items()
+        if p.default is inspect.Parameter.empty and name not in RESERVED and name not in config
+    )
+    if missing:
+        raise ValueError(f"Missing required config keys: {', '.join(missing)}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("config", help="JSON file with send_batch arguments")
+    ap.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                    help="override one config value (repeatable)")
+    args = ap.parse_args(argv)
+
+    from sender import send_batch
+
+    reporter = JsonLinesReporter()
+    try:
+        config = load_config(args.config, args.set)
+        check_config(config, send_batch)
+    except (OSError, ValueError) as e:
+        reporter.done(False, f"config: {e}")
+        return 2
+
+    try:
+        ok = asyncio.run(send_batch(gui=reporter, **config))
+    except KeyboardInterrupt:
+        reporter.done(False, "cancelled")
+        return 130
+    except Exception as e:
+        reporter.done(False, str(e))
+        return 1
+    if not ok:
+        reporter.done(False, "browser launch or login failed (see log)")
+        return 1
+    reporter.done(True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
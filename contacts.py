@@ -0,0 +1,257 @@
+import csv
+from itertools import islice
+from pathlib import Path
+
+# Rows are read in batches of this size from Parquet files.
+PARQUET_BATCH_ROWS = 4096
+
+
+# ------------- CELL HELPERS -------------
+
+
+def _cell_to_str(value):
+    """
+    Convert a raw cell value to the string form pandas' dtype=str produced.
+    Empty cells become None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return None
+        if value.is_integer():
+            # Phone numbers typed into Excel come back as floats (9198...0.0)
+            return str(int(value))
+    text = str(value)
+    return text if text != "" else None
+
+
+def read_arrow(path):
+    """
+    Arrow IPC file, memory-mapped: columns are used in place, not copied.
+    """
+    import pyarrow as pa
+
+    with pa.memory_map(str(path), "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def _normalize_header(header):
+    return [str(c).strip().lower() if c is not None else "" for c in header]
+
+
+def _contacts_format(path) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix in (".xlsx", ".xlsm"):
+        return "xlsx"
+    if suffix in (".csv", ".txt"):
+        return "csv"
+    if suffix in (".parquet", ".pq"):
+        return "parquet"
+    if suffix in (".arrow", ".feather"):
+        return "arrow"
+    raise ValueError(f"Unsupported contacts file type: {suffix or path}")
+
+
+# ------------- HEADER / COUNT -------------
+
+
+def read_header(path) -> list:
+    """
+    Return the lower-cased column names of a contacts file
+    without reading any data rows.
+    """
+    fmt = _contacts_format(path)
+
+    if fmt == "xlsx":
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            ws = wb.worksheets[0]
+            first = next(ws.iter_rows(max_row=1, values_only=True), ())
+            return _normalize_header(first)
+        finally:
+            wb.close()
+
+    if fmt == "csv":
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            return _normalize_header(next(csv.reader(f), []))
+
+    if fmt == "arrow":
+        return _normalize_header(read_arrow(path).column_names)
+
+    import pyarrow.parquet as pq
+
+    return _normalize_header(pq.ParquetFile(path).schema_arrow.names)
+
+
+def count_contacts(path) -> int:
+    """
+    Number of data rows (header excluded).
+    Uses file metadata where the format has it, so no rows are parsed.
+    """
+    fmt = _contacts_format(path)
+
+    if fmt == "xlsx":
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            ws = wb.worksheets[0]
+            max_row = ws.max_row
+            if max_row is None:
+                # Sheet has no <dimension> element; count rows by streaming
+                ws.reset_dimensions()
+                max_row = sum(1 for _ in ws.iter_rows(values_only=True))
+            return max(max_row - 1, 0)
+        finally:
+            wb.close()
+
+    if fmt == "csv":
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+    if fmt == "arrow":
+        return read_arrow(path).num_rows
+
+    import pyarrow.parquet as pq
+
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+def read_column(path, column: str) -> list:
+    """
+    Read a single column (by lower-cased name) as a list of strings/None.
+    Only that column is materialized, not whole rows.
+    """
+    fmt = _contacts_format(path)
+    header = read_header(path)
+    if column not in header:
+        raise ValueError(f"Contacts file has no '{column}' column")
+    idx = header.index(column)
+
+    if fmt == "xlsx":
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            ws = wb.worksheets[0]
+            return [
+                _cell_to_str(row[0]) if row else None
+                for row in ws.iter_rows(
+                    min_row=2, min_col=idx + 1, max_col=idx + 1, values_only=True
+                )
+            ]
+        finally:
+            wb.close()
+
+    if fmt == "csv":
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            return [
+                (row[idx] or None) if idx < len(row) else None for row in reader
+            ]
+
+    if fmt == "arrow":
+        return [_cell_to_str(v) for v in read_arrow(path).column(idx).to_pylist()]
+
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(path)
+    name = pf.schema_arrow.names[idx]
+    return [_cell_to_str(v) for v in pf.read(columns=[name]).column(0).to_pylist()]
+
+
+# ------------- STREAMING ROWS -------------
+
+
+def _iter_xlsx(path, start: int):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        header = _normalize_header(
+            next(ws.iter_rows(max_row=1, values_only=True), ())
+        )
+        # openpyxl's read-only reader streams the sheet XML; min_row lets it
+        # skip parsing cell values for rows before the resume position.
+        # Blank rows are still yielded so row numbers match count_contacts().
+        for row in ws.iter_rows(min_row=start + 2, values_only=True):
+            yield {k: _cell_to_str(v) for k, v in zip(header, row) if k}
+    finally:
+        wb.close()
+
+
+def _iter_csv(path, start: int):
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = _normalize_header(next(reader, []))
+        for row in islice(reader, start, None):
+            yield {k: (v if v != "" else None) for k, v in zip(header, row) if k}
+
+
+def _iter_parquet(path, start: int):
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(path)
+    header = _normalize_header(pf.schema_arrow.names)
+
+    # Seek by row group: skip whole groups that end before `start`
+    skip = start
+    groups = []
+    for g in range(pf.metadata.num_row_groups):
+        n = pf.metadata.row_group(g).num_rows
+        if not groups and skip >= n:
+            skip -= n
+            continue
+        groups.append(g)
+
+    if not groups:
+        return
+
+    for batch in pf.iter_batches(batch_size=PARQUET_BATCH_ROWS, row_groups=groups):
+        if skip >= batch.num_rows:
+            skip -= batch.num_rows
+            continue
+        columns = [batch.column(i).to_pylist() for i in range(batch.num_columns)]
+        for r in range(skip, batch.num_rows):
+            yield {
+                k: _cell_to_str(col[r]) for k, col in zip(header, columns) if k
+            }
+        skip = 0
+
+
+def _iter_arrow(path, start: int):
+    table = read_arrow(path)
+    header = _normalize_header(table.column_names)
+    # Slicing a memory-mapped table is free; rows are converted per batch
+    for batch in table.slice(start).to_batches(max_chunksize=PARQUET_BATCH_ROWS):
+        columns = [batch.column(i).to_pylist() for i in range(batch.num_columns)]
+        for r in range(batch.num_rows):
+            yield {
+                k: _cell_to_str(col[r]) for k, col in zip(header, columns) if k
+            }
+
+
+def iter_contacts(path, start: int = 0):
+    """
+    Lazily yield contact rows as dicts keyed by lower-cased column name.
+
+    Supports .xlsx (openpyxl read-only mode), .csv, .parquet and Arrow IPC
+    (.arrow / .feather, as written by contacts_cache.py).
+    `start` is the 0-based data row to resume from; rows before it are
+    skipped without being materialized.
+    """
+    fmt = _contacts_format(path)
+    start = max(int(start or 0), 0)
+
+    if fmt == "xlsx":
+        return _iter_xlsx(path, start)
+    if fmt == "csv":
+        return _iter_csv(path, start)
+    if fmt == "arrow":
+        return _iter_arrow(path, start)
+    return _iter_parquet(path, start)
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import NamedTuple
+
+from contacts import count_contacts, iter_contacts, read_arrow, read_column, read_header
+from phones import PreflightResult, preflight
+
+CONTACTS_CACHE_DIR = "contacts-cache"
+# Bump when the cached layout or the phone normalization changes
+CACHE_VERSION = 2
+
+# Extra column with the pre-flight result (E.164 number, or null for
+# invalid / duplicate rows)
+PHONE_COLUMN = "__phone_e164"
+_META_KEY = b"wbs_contacts"
+# Rows per record batch when building the cache; all it keeps in memory
+# besides the phone column
+BUILD_BATCH_ROWS = 8192
+
+
+class Contacts(NamedTuple):
+    """
+    A contacts file ready for send_batch.
+
+    - path: file to stream rows from (the Arrow cache, or the original)
+    - columns: lower-cased column names of the original file
+    - total: number of data rows
+    - checked: phones.PreflightResult for the phone column
+    - cached: True when read from an up-to-date cache
+    """
+
+    path: Path
+    columns: list
+    total: int
+    checked: PreflightResult
+    cached: bool = False
+
+
+def file_digest(path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_path(path, folder=CONTACTS_CACHE_DIR) -> Path:
+    """
+    One cache file per source path; a new version of the file replaces it.
+    """
+    key = hashlib.blake2b(str(Path(path).resolve()).encode("utf-8"), digest_size=8)
+    return Path(folder) / f"{Path(path).stem}-{key.hexdigest()}.arrow"
+
+
+def _check_columns(columns):
+    if "name" not in columns or "phone" not in columns:
+        raise ValueError("Contacts file must include columns: name, phone")
+
+
+def _parse(path, default_country_code: str) -> Contacts:
+    columns = read_header(path)
+    _check_columns(columns)
+    checked = preflight(read_column(path, "phone"), default_country_code)
+    return Contacts(Path(path), columns, count_contacts(path), checked)
+
+
+# ------------- CACHE FILE -------------
+
+
+def _read_meta(cache):
+    """
+    Fingerprint stored in the cache's schema metadata; None if the file is
+    missing or unreadable.
+    """
+    import pyarrow as pa
+
+    try:
+        with pa.memory_map(str(cache), "r") as source:
+            schema = pa.ipc.open_file(source).schema
+        return json.loads(schema.metadata[_META_KEY])
+    except (OSError, KeyError, TypeError, ValueError, pa.ArrowInvalid):
+        return None
+
+
+def _touch(cache, meta):
+    """
+    Rewrite the stored fingerprint (content unchanged), one record batch
+    at a time. Read without a memory map: Windows cannot replace a mapped
+    file.
+    """
+    import pyarrow as pa
+
+    tmp = cache.with_name(cache.name + ".tmp")
+    with pa.OSFile(str(cache), "rb") as source:
+        reader = pa.ipc.open_file(source)
+        schema = reader.schema.with_metadata({_META_KEY: json.dumps(meta)})
+        with pa.OSFile(str(tmp), "wb") as sink:
+            with pa.ipc.new_file(sink, schema) as writer:
+                for b in range(reader.num_record_batches):
+                    batch = reader.get_batch(b)
+                    writer.write_batch(pa.record_batch(batch.columns, schema=schema))
+    os.replace(tmp, cache)
+
+
+def _build(path, cache, default_country_code: str, meta: dict):
+    """
+    Write the cache for `path`: pre-flight on the phone column alone, then
+    the rows streamed into string columns plus PHONE_COLUMN, in record
+    batches of BUILD_BATCH_ROWS. Returns (columns, checked, rows).
+    """
+    import pyarrow as pa
+
+    columns = read_header(path)
+    _check_columns(columns)
+    checked = preflight(read_column(path, "phone"), default_country_code)
+    names = [c for c in dict.fromkeys(columns) if c]
+    meta = {**meta, "columns": columns, "report": checked.report}
+    schema = pa.schema(
+        [(c, pa.string()) for c in names] + [(PHONE_COLUMN, pa.string())],
+        metadata={_META_KEY: json.dumps(meta)},
+    )
+
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache.with_name(cache.name + ".tmp")
+    rows = 0
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+
+            def flush(batch):
+                n = len(batch[names[0]])
+                arrays = [pa.array(batch[c], type=pa.string()) for c in names]
+                arrays.append(pa.array(checked.phones[rows:rows + n], type=pa.string()))
+                writer.write_batch(pa.record_batch(arrays, schema=schema))
+                return n
+
+            batch = {c: [] for c in names}
+            for rec in iter_contacts(path):
+                for c in names:
+                    batch[c].append(rec.get(c))
+                if len(batch[names[0]]) >= BUILD_BATCH_ROWS:
+                    rows += flush(batch)
+                    batch = {c: [] for c in names}
+            if batch[names[0]]:
+                rows += flush(batch)
+    os.replace(tmp, cache)
+    return columns, checked, rows
+
+
+def load_contacts(path, default_country_code: str = "", folder=CONTACTS_CACHE_DIR) -> Contacts:
+    """
+    Header, row count and pre-flight result of a contacts file, with rows
+    streamed later from `Contacts.path`.
+
+    With a cache folder, the parsed and validated table is kept there as
+    an Arrow IPC file keyed by the source's path, size, mtime, content hash
+    and default country code. An unchanged file (or one only touched: same
+    hash) loads memory-mapped without parsing; any change rebuilds it.
+    folder=None parses the original every time.
+    """
+    if folder is None:
+        return _parse(path, default_country_code)
+
+    source = Path(path).resolve()
+    st = source.stat()
+    cache = cache_path(source, folder)
+    key = {
+        "version": CACHE_VERSION,
+        "path": str(source),
+        "size": st.st_size,
+        "country_code": default_country_code or "",
+    }
+
+    meta = _read_meta(cache) if cache.exists() else None
+    if meta is not None and all(meta.get(k) == v for k, v in key.items()):
+        digest = None
+        if meta.get("mtime_ns") != st.st_mtime_ns:
+            # Touched or copied over: only a content change invalidates
+            digest = file_digest(source)
+        if digest is None or digest == meta.get("digest"):
+            if digest is not None:
+                _touch(cache, {**meta, "mtime_ns": st.st_mtime_ns})
+            table = read_arrow(cache)
+            phones = table.column(PHONE_COLUMN).to_pylist()
+            report = dict(meta["report"])
+            for examples in ("invalid_examples", "country_code_examples"):
+                report[examples] = [tuple(e) for e in report[examples]]
+            checked = PreflightResult(phones, report)
+            return Contacts(cache, meta["columns"], table.num_rows, checked, cached=True)
+
+    columns, checked, rows = _build(
+        source,
+        cache,
+        default_country_code,
+        {**key, "mtime_ns": st.st_mtime_ns, "digest": file_digest(source)},
+    )
+    return Contacts(cache, columns, rows, checked)
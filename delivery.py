@@ -0,0 +1,243 @@
+import asyncio
+import re
+import time
+
+from reporter import gui_append
+
+# Tick icon (data-icon) -> delivery status
+TICK_STATUS = {
+    "msg-time": "pending",
+    "msg-check": "sent",
+    "msg-dblcheck": "delivered",
+    "msg-dblcheck-ack": "read",
+}
+# Later statuses win; "failed" is final
+STATUS_RANK = {"pending": 0, "sent": 1, "delivered": 2, "read": 3, "failed": 4}
+CONFIRMED = ("sent", "delivered", "read")
+
+# Outgoing bubbles carry data-id="true_<phone>@c.us_<message id>"
+_BUBBLE_PHONE = re.compile(r"^true_(\d+)@")
+
+# Bubbles first seen this long before Enter belong to the chat history
+HISTORY_TOLERANCE = 0.05
+
+# Installed in every page of the context: a MutationObserver records the
+# tick icon of outgoing message bubbles as it changes, with the time the
+# bubble first appeared (so older messages in the chat history can be told
+# apart); window.__wbsTicks() returns and clears the changes since the
+# previous call as {data-id: [icon, first seen ms]}.
+TICKS_INIT_JS = """
+(() => {
+  if (window.__wbsTicks) return;
+  const changes = {};
+  const first = {};
+  window.__wbsTicks = () => {
+    const out = Object.assign({}, changes);
+    for (const k in changes) delete changes[k];
+    return out;
+  };
+  const ICONS = "span[data-icon^='msg-'], span[data-icon*='error']";
+  const note = icon => {
+    const bubble = icon.closest("[data-id^='true_']");
+    if (!bubble) return;
+    const id = bubble.getAttribute("data-id");
+    if (!(id in first)) first[id] = Date.now();
+    changes[id] = [icon.getAttribute("data-icon"), first[id]];
+  };
+  const scan = node => {
+    if (node.nodeType !== 1) return;
+    if (node.matches(ICONS)) note(node);
+    node.querySelectorAll(ICONS).forEach(note);
+  };
+  const start = () => new MutationObserver(records => {
+    for (const r of records) {
+      if (r.type === "attributes") { if (r.target.matches(ICONS)) note(r.target); }
+      else r.addedNodes.forEach(scan);
+    }
+  }).observe(document.documentElement, {
+    subtree: true, childList: true, attributes: true, attributeFilter: ["data-icon"],
+  });
+  if (document.documentElement) start();
+  else document.addEventListener("DOMContentLoaded", start);
+})();
+"""
+
+
+def tick_status(icon: str):
+    if "error" in icon:
+        return "failed"
+    return TICK_STATUS.get(icon)
+
+
+class DeliveryTracker:
+    """
+    Follows the ticks of sent messages in the background.
+
+    The send loop calls expect(phone) after pressing Enter and moves on.
+    A background task polls the page-side tick log every `poll_interval`
+    seconds (one cheap evaluate; the waiting is done by the observer in the
+    page). Each message ends up as:
+
+    - confirmed   (sent / delivered / read tick seen) -> ledger delivery column
+    - pending     (only the clock icon within `timeout`, or still open when
+      the tracker is closed, e.g. on STOP)
+    - unconfirmed (no tick seen at all within `timeout`)
+    - failed      (error icon seen); only then does the ledger status go
+      back to "failed" so the next run retries it
+
+    Pending and unconfirmed messages keep their "sent" status: the message
+    may well have gone out, and sending it twice is worse than missing one.
+
+    Final counts go to the journal ("delivery" records) and the metrics.
+    """
+
+    def __init__(
+        self,
+        context,
+        get_page,
+        ledger,
+        journal=None,
+        metrics=None,
+        gui=None,
+        poll_interval: float = 2.0,
+        timeout: float = 120.0,
+    ):
+        self.context = context
+        self.get_page = get_page
+        self.ledger = ledger
+        self.journal = journal
+        self.metrics = metrics
+        self.gui = gui
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        # phone -> {"contact", "sent_at", "since", "status"}
+        self.expected = {}
+        self.counts = {"confirmed": 0, "pending": 0, "unconfirmed": 0, "failed": 0}
+        self._task = None
+
+    def _log(self, msg):
+        if self.gui is not None:
+            gui_append(self.gui, msg)
+
+    async def install(self):
+        await self.context.add_init_script(TICKS_INIT_JS)
+        try:
+            await self.get_page().evaluate(TICKS_INIT_JS)  # already loaded
+        except Exception:
+            pass
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def expect(self, phone: str, contact=None, since: float = None):
+        """
+        Track the message just sent to `phone`; `since` is the wall time
+        (time.time()) taken just before Enter.
+        """
+        self.expected[phone] = {
+            "contact": contact,
+            "sent_at": time.monotonic(),
+            "since": since if since is not None else time.time(),
+            "status": None,
+        }
+
+    # ---- polling ----
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await self.poll()
+
+    async def poll(self):
+        """
+        Apply tick changes from the page and settle expired messages.
+        Call before leaving a page (reload / recycle) so none are lost.
+        """
+        if not self.expected:
+            return
+        try:
+            changes = await self.get_page().evaluate("window.__wbsTicks ? window.__wbsTicks() : {}")
+        except Exception:
+            changes = {}
+        for bubble_id, (icon, first_seen_ms) in (changes or {}).items():
+            status = tick_status(icon or "")
+            if status is None:
+                continue
+            m = _BUBBLE_PHONE.match(bubble_id)
+            # Unknown id format: the open chat is the latest send
+            phone = m.group(1) if m else self._latest()
+            if phone not in self.expected:
+                continue
+            # Page and sender share the machine's wall clock
+            if first_seen_ms / 1000 < self.expected[phone]["since"] - HISTORY_TOLERANCE:
+                continue  # an older message in the chat history
+            self._update(phone, status)
+        self._settle(time.monotonic() - self.timeout)
+
+    def _latest(self):
+        if not self.expected:
+            return None
+        return max(self.expected, key=lambda p: self.expected[p]["sent_at"])
+
+    def _update(self, phone, status):
+        entry = self.expected[phone]
+        if entry["status"] is not None and STATUS_RANK[status] <= STATUS_RANK[entry["status"]]:
+            return
+        entry["status"] = status
+        if status in CONFIRMED:
+            self.ledger.set_delivery(phone, status)
+        if status in ("delivered", "read", "failed"):
+            # Nothing later can change the outcome
+            self._finish(phone)
+
+    def _settle(self, older_than: float, timed_out: bool = True):
+        for phone in [p for p, e in self.expected.items() if e["sent_at"] <= older_than]:
+            self._finish(phone, timed_out)
+
+    def _finish(self, phone, timed_out: bool = True):
+        entry = self.expected.pop(phone)
+        status = entry["status"]
+        if status in CONFIRMED:
+            outcome = "confirmed"
+        elif status == "failed":
+            outcome = "failed"
+            self.ledger.set_delivery(phone, "failed", status="failed")
+            self._log(f"⚠ WhatsApp reported an error for the message to {phone}; marked failed.")
+        elif status == "pending" or not timed_out:
+            # Clock icon only, or not watched long enough to tell
+            outcome = "pending"
+            self.ledger.set_delivery(phone, "pending")
+        else:
+            outcome = "unconfirmed"
+            self.ledger.set_delivery(phone, "unconfirmed")
+            self._log(f"⚠ No delivery tick seen for the message to {phone}.")
+        self.counts[outcome] += 1
+        if self.metrics is not None:
+            self.metrics.incr(f"delivery_{outcome}")
+        if self.journal is not None:
+            self.journal.record("delivery", last_run_delivery=dict(self.counts))
+
+    async def close(self, grace: float = 10.0):
+        """
+        Stop polling; give the latest messages up to `grace` seconds to get
+        their ticks, then settle everything still open as pending (never
+        failed: a message sent just before STOP simply had no time).
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        deadline = time.monotonic() + grace
+        while self.expected and time.monotonic() < deadline:
+            await self.poll()
+            if self.expected:
+                await asyncio.sleep(min(0.5, self.poll_interval))
+        self._settle(float("inf"), timed_out=False)
+
+    def summary_line(self) -> str:
+        c = self.counts
+        return (
+            f"   delivery: {c['confirmed']} confirmed, {c['pending']} pending, "
+            f"{c['unconfirmed']} unconfirmed, {c['failed']} failed"
+        )
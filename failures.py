@@ -0,0 +1,103 @@
+from typing import NamedTuple
+
+# Failure classes
+INVALID_NUMBER = "invalid_number"  # WhatsApp says the number has no account
+NETWORK = "network"                # offline / DNS / connection errors
+LOGGED_OUT = "logged_out"          # QR code shown again
+SELECTOR_MISS = "selector_miss"    # expected UI element never appeared
+UNKNOWN = "unknown"
+
+# selectors.json elements whose appearance identifies a failure at once
+FAILURE_ELEMENTS = {
+    "invalid_number": INVALID_NUMBER,
+    "qr": LOGGED_OUT,
+    "offline": NETWORK,
+}
+
+DESCRIPTIONS = {
+    INVALID_NUMBER: "WhatsApp reports this number as invalid",
+    NETWORK: "network connection lost",
+    LOGGED_OUT: "WhatsApp Web session logged out",
+    SELECTOR_MISS: "expected page element did not appear",
+    UNKNOWN: "unexpected error",
+}
+
+# Substrings of Playwright / Chromium errors that mean the network is down
+NETWORK_ERRORS = (
+    "net::ERR_INTERNET_DISCONNECTED",
+    "net::ERR_NETWORK_CHANGED",
+    "net::ERR_NAME_NOT_RESOLVED",
+    "net::ERR_CONNECTION",
+    "net::ERR_TIMED_OUT",
+    "net::ERR_PROXY",
+    "net::ERR_ADDRESS_UNREACHABLE",
+)
+
+
+class Policy(NamedTuple):
+    """
+    - action: "fail" (give up on the contact now), "retry", "relogin"
+      (wait for the QR to be scanned; the campaign aborts if it is not) or
+      "reconnect" (wait for the connection to come back; the campaign stops
+      at this contact if it does not; never the contact's outcome)
+    - backoff: seconds before the first retry, doubled per attempt
+    - max_backoff: cap for the doubled delay
+    """
+
+    action: str
+    backoff: float = 0.0
+    max_backoff: float = 0.0
+
+
+POLICIES = {
+    INVALID_NUMBER: Policy("fail"),
+    NETWORK: Policy("reconnect", 5.0, 120.0),
+    LOGGED_OUT: Policy("relogin"),
+    SELECTOR_MISS: Policy("retry", 2.0, 10.0),
+    UNKNOWN: Policy("retry", 5.0, 30.0),
+}
+
+
+class SendFailure(RuntimeError):
+    """
+    A classified failure while sending to one contact.
+    """
+
+    def __init__(self, kind: str, detail: str = ""):
+        self.kind = kind
+        message = DESCRIPTIONS.get(kind, kind)
+        super().__init__(f"{message} ({detail})" if detail else message)
+
+
+def classify_exception(exc: BaseException) -> str:
+    if isinstance(exc, SendFailure):
+        return exc.kind
+    text = str(exc)
+    if any(marker in text for marker in NETWORK_ERRORS):
+        return NETWORK
+    return UNKNOWN
+
+
+async def detect_failure(page, registry):
+    """
+    Look at the page for a known failure state. Returns a failure class,
+    or None if nothing recognisable is shown.
+    """
+    for element, kind in FAILURE_ELEMENTS.items():
+        if registry.has(element):
+            try:
+                if await registry.query(page, element, record_miss=False):
+                    return kind
+            except Exception:
+                pass
+    try:
+        if not await page.evaluate("navigator.onLine"):
+            return NETWORK
+    except Exception:
+        pass
+    return None
+
+
+def backoff_seconds(kind: str, attempt: int) -> float:
+    policy = POLICIES.get(kind, POLICIES[UNKNOWN])
+    return min(policy.backoff * (2 ** (attempt - 1)), policy.max_backoff)
@@ -0,0 +1,161 @@
+import json
+import os
+import time
+
+
+# ------------- ATOMIC SNAPSHOT -------------
+
+
+def write_json_atomic(path, data: dict) -> None:
+    """
+    Write JSON so readers only ever see the old or the new file:
+    write a temp file, fsync it, then rename it over the target.
+    """
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_json(path) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+# ------------- PROGRESS JOURNAL -------------
+
+
+class ProgressJournal:
+    """
+    Append-only progress log backed by a compacted snapshot.
+
+    Every contact outcome appends one compact JSON line to `<snapshot>.journal`
+    (O(1), no rewrite). Lines are flushed to the OS immediately, so a crashed
+    process loses nothing; fsync is group-committed every `fsync_every`
+    records or `fsync_interval` seconds, whichever comes first, which bounds
+    what a power loss can take. Every `compact_every` records the folded
+    state is written atomically to the snapshot and the journal is truncated.
+
+    Records carry absolute values (last_index, sent_today, ...), so replaying
+    a record twice is harmless and a torn final line is simply ignored.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: str,
+        fsync_every: int = 50,
+        fsync_interval: float = 2.0,
+        compact_every: int = 1000,
+    ):
+        self.snapshot_path = str(snapshot_path)
+        self.journal_path = f"{self.snapshot_path}.journal"
+        self.fsync_every = max(int(fsync_every), 1)
+        self.fsync_interval = float(fsync_interval)
+        self.compact_every = max(int(compact_every), 1)
+
+        self.state = {}
+        self._fh = None
+        self._unsynced = 0
+        self._since_compact = 0
+        self._last_sync = time.monotonic()
+
+    # ---- reading ----
+
+    def load(self) -> dict:
+        """
+        Fold snapshot + journal into the current state and return a copy.
+        """
+        state = read_json(self.snapshot_path)
+        replayed = 0
+
+        if os.path.exists(self.journal_path):
+            good_bytes = 0
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("incomplete record")
+                        rec = json.loads(line)
+                    except ValueError:
+                        # Torn write at the tail; everything before it is good
+                        break
+                    rec.pop("outcome", None)
+                    state.update(rec)
+                    replayed += 1
+                    good_bytes += len(line)
+
+            # Drop the torn tail so new records are not appended after it
+            if good_bytes < os.path.getsize(self.journal_path):
+                os.truncate(self.journal_path, good_bytes)
+
+        self.state = state
+        self._since_compact = replayed
+        return dict(state)
+
+    # ---- writing ----
+
+    def _open(self):
+        if self._fh is None:
+            self._fh = open(self.journal_path, "a", encoding="utf-8")
+        return self._fh
+
+    def record(self, outcome: str, **fields) -> None:
+        """
+        Append one outcome record (e.g. "sent", "failed", "skipped").
+        """
+        self.state.update(fields)
+        line = json.dumps({"outcome": outcome, **fields}, separators=(",", ":"))
+
+        fh = self._open()
+        fh.write(line + "\n")
+        fh.flush()
+
+        self._unsynced += 1
+        self._since_compact += 1
+
+        now = time.monotonic()
+        if (
+            self._unsynced >= self.fsync_every
+            or now - self._last_sync >= self.fsync_interval
+        ):
+            self.sync()
+
+        if self._since_compact >= self.compact_every:
+            self.compact()
+
+    def sync(self) -> None:
+        if self._fh is not None and self._unsynced:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def compact(self) -> None:
+        """
+        Write the folded state as the new snapshot and start a fresh journal.
+        """
+        self.sync()
+        write_json_atomic(self.snapshot_path, self.state)
+
+        # Snapshot is durable; records in the journal are now redundant.
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        with open(self.journal_path, "w", encoding="utf-8"):
+            pass
+        self._since_compact = 0
+
+    def close(self) -> None:
+        if self._fh is not None or self._since_compact:
+            self.compact()
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
@@ -0,0 +1,156 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+LEDGER_FILE = "ledger.db"
+
+
+class DeliveryLedger:
+    """
+    Persistent record of which phone numbers were messaged, keyed by the
+    normalized phone number.
+
+    The phone is the table's primary key (WITHOUT ROWID, so the table *is*
+    the B-tree index), which keeps lookups at a single index probe no matter
+    how many millions of numbers are stored. Resume by row number breaks when
+    the contact file is edited or swapped; this does not.
+    """
+
+    def __init__(self, path: str = LEDGER_FILE):
+        self.path = str(path)
+        # check_same_thread=False: the GUI may create the ledger on one thread
+        # while the sender loop uses it on another (never concurrently).
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL + synchronous=NORMAL: commits do not fsync, the WAL is still
+        # crash-safe for the application (only an OS crash can roll back
+        # the last few commits).
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS deliveries (
+                phone      TEXT PRIMARY KEY,
+                status     TEXT NOT NULL,
+                attempts   INTEGER NOT NULL DEFAULT 1,
+                source     TEXT,
+                updated_at TEXT NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        # Delivery state from the tick tracker (delivery.py); added after the
+        # table first shipped, so older ledgers are migrated in place.
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(deliveries)")}
+        if "delivery" not in columns:
+            self.conn.execute("ALTER TABLE deliveries ADD COLUMN delivery TEXT")
+        # Daily totals across campaigns (sent_since)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS deliveries_updated_at ON deliveries (updated_at)"
+        )
+
+        # Negative cache: numbers WhatsApp rejected, checked before sending
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS bad_numbers (
+                phone      TEXT PRIMARY KEY,
+                reason     TEXT NOT NULL,
+                hits       INTEGER NOT NULL DEFAULT 1,
+                first_seen TEXT NOT NULL,
+                last_seen  TEXT NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        self.conn.commit()
+
+    def status(self, phone: str):
+        """
+        Last recorded status for `phone`, or None if it was never tried.
+        """
+        row = self.conn.execute(
+            "SELECT status FROM deliveries WHERE phone = ?", (phone,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def already_sent(self, phone: str) -> bool:
+        return self.status(phone) == "sent"
+
+    def record(self, phone: str, status: str, source: str = None) -> None:
+        """
+        Upsert the outcome for `phone` with the current timestamp.
+        """
+        self.conn.execute(
+            """
+            INSERT INTO deliveries (phone, status, attempts, source, updated_at)
+            VALUES (?, ?, 1, ?, ?)
+            ON CONFLICT(phone) DO UPDATE SET
+                status = excluded.status,
+                attempts = deliveries.attempts + 1,
+                source = excluded.source,
+                updated_at = excluded.updated_at
+            """,
+            (phone, status, source, datetime.now().isoformat(timespec="seconds")),
+        )
+        self.conn.commit()
+
+    def sent_since(self, since: datetime) -> int:
+        """
+        Numbers recorded as sent at or after `since`, by any campaign.
+        """
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM deliveries WHERE status = 'sent' AND updated_at >= ?",
+            (since.isoformat(timespec="seconds"),),
+        ).fetchone()
+        return row[0]
+
+    def set_delivery(self, phone: str, delivery: str, status: str = None) -> None:
+        """
+        Store the confirmed delivery state ("sent", "delivered", "read",
+        "pending", "unconfirmed", "failed"); `status` also overrides the send
+        status.
+        """
+        if status is None:
+            self.conn.execute(
+                "UPDATE deliveries SET delivery = ? WHERE phone = ?", (delivery, phone)
+            )
+        else:
+            self.conn.execute(
+                "UPDATE deliveries SET delivery = ?, status = ? WHERE phone = ?",
+                (delivery, status, phone),
+            )
+        self.conn.commit()
+
+    def bad_reason(self, phone: str, max_age_days: float = None):
+        """
+        Why `phone` is known to be bad, or None. With max_age_days, entries
+        not seen again for that long are ignored (the number may have
+        joined WhatsApp since).
+        """
+        row = self.conn.execute(
+            "SELECT reason, last_seen FROM bad_numbers WHERE phone = ?", (phone,)
+        ).fetchone()
+        if row is None:
+            return None
+        if max_age_days:
+            age = datetime.now() - datetime.fromisoformat(row[1])
+            if age > timedelta(days=max_age_days):
+                return None
+        return row[0]
+
+    def mark_bad(self, phone: str, reason: str) -> None:
+        now = datetime.now().isoformat(timespec="seconds")
+        self.conn.execute(
+            """
+            INSERT INTO bad_numbers (phone, reason, hits, first_seen, last_seen)
+            VALUES (?, ?, 1, ?, ?)
+            ON CONFLICT(phone) DO UPDATE SET
+                reason = excluded.reason,
+                hits = bad_numbers.hits + 1,
+                last_seen = excluded.last_seen
+            """,
+            (phone, reason, now, now),
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        try:
+            self.conn.close()
+        except sqlite3.Error:
+            pass
@@ -0,0 +1,246 @@
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+
+TRACE_FILE = "send_trace.jsonl"
+PROMETHEUS_FILE = "metrics.prom"
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 180.0)
+
+COUNTERS = ("sent", "failed", "retries", "skipped")
+# Contact outcomes; other counters are attempt-level ("retries",
+# "failure_<class>" from failures.py) or delivery states
+# ("delivery_<state>" from delivery.py)
+OUTCOMES = ("sent", "failed", "skipped")
+
+
+class StageHistogram:
+    """
+    Cumulative bucket histogram (for Prometheus) plus a rolling window of
+    recent samples (for live percentiles).
+    """
+
+    def __init__(self, window: int = 500):
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+        for n, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[n] += 1
+                break
+
+    def percentile(self, q: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class SendMetrics:
+    """
+    Per-stage timings and outcome counters for one send_batch run.
+
+    - stage("goto", contact=i): monotonic timer around a pipeline stage
+    - incr("sent"): outcome counters (sent, failed, retries, skipped)
+    - set_gauge("browser_js_heap_mb", v): last-value readings
+    - every sample is appended to a JSON-lines trace
+    - a Prometheus text-format file is rewritten every `export_interval`
+      seconds and on close()
+    """
+
+    def __init__(
+        self,
+        total: int = 0,
+        trace_path=TRACE_FILE,
+        prometheus_path=PROMETHEUS_FILE,
+        export_interval: float = 15.0,
+        rate_window: int = 50,
+    ):
+        self.total = total
+        self.stages = {}
+        self.counters = {c: 0 for c in COUNTERS}
+        # last-value readings, e.g. browser_js_heap_mb
+        self.gauges = {}
+        self.started = time.monotonic()
+        self.prometheus_path = prometheus_path
+        self.export_interval = export_interval
+        self._last_export = 0.0
+        # monotonic times of recent completed contacts, for live throughput
+        self._done_times = deque(maxlen=rate_window)
+        self._trace = (
+            open(trace_path, "a", encoding="utf-8", buffering=1) if trace_path else None
+        )
+
+    # ---- recording ----
+
+    def observe(self, stage: str, seconds: float, contact=None):
+        hist = self.stages.get(stage)
+        if hist is None:
+            hist = self.stages[stage] = StageHistogram()
+        hist.observe(seconds)
+        if self._trace is not None:
+            self._trace.write(
+                json.dumps(
+                    {
+                        "ts": round(time.time(), 3),
+                        "contact": contact,
+                        "stage": stage,
+                        "seconds": round(seconds, 4),
+                    },
+                    separators=(",", ":"),
+                )
+                + "\n"
+            )
+
+    @contextmanager
+    def stage(self, name: str, contact=None):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - started, contact)
+
+    def incr(self, counter: str, n: int = 1):
+        self.counters[counter] = self.counters.get(counter, 0) + n
+        if counter in OUTCOMES:
+            self._done_times.append(time.monotonic())
+        if time.monotonic() - self._last_export >= self.export_interval:
+            self.export()
+
+    def set_gauge(self, name: str, value: float):
+        self.gauges[name] = value
+
+    # ---- derived ----
+
+    def throughput_per_hour(self) -> float:
+        """
+        Contacts completed per hour over the recent window (includes the
+        pacing delays, so it is the real campaign rate).
+        """
+        if len(self._done_times) >= 2:
+            span = self._done_times[-1] - self._done_times[0]
+            if span > 0:
+                return (len(self._done_times) - 1) * 3600.0 / span
+        elapsed = time.monotonic() - self.started
+        done = sum(self.counters[c] for c in OUTCOMES)
+        return done * 3600.0 / elapsed if elapsed > 0 and done else 0.0
+
+    def eta_seconds(self, remaining: int):
+        rate = self.throughput_per_hour()
+        return remaining * 3600.0 / rate if rate > 0 else None
+
+    def snapshot(self, remaining: int = None) -> dict:
+        return {
+            **self.counters,
+            "elapsed": time.monotonic() - self.started,
+            "throughput_per_hour": self.throughput_per_hour(),
+            "eta_seconds": self.eta_seconds(remaining) if remaining is not None else None,
+            "stages": {
+                name: {
+                    "count": h.count,
+                    "avg": h.sum / h.count if h.count else 0.0,
+                    "p50": h.percentile(0.5),
+                    "p95": h.percentile(0.95),
+                }
+                for name, h in self.stages.items()
+            },
+        }
+
+    def summary_lines(self) -> list:
+        lines = [
+            "⏱ Stage timings (count / avg / p95):",
+        ]
+        for name, h in self.stages.items():
+            if h.count:
+                lines.append(
+                    f"   {name:<14} {h.count:>6}  {h.sum / h.count:7.2f}s  "
+                    f"{h.percentile(0.95):7.2f}s"
+                )
+        c = self.counters
+        lines.append(
+            f"   sent {c['sent']}, failed {c['failed']}, retries {c['retries']}, "
+            f"skipped {c['skipped']}, {self.throughput_per_hour():.1f}/h"
+        )
+        return lines
+
+    # ---- export ----
+
+    def prometheus_text(self) -> str:
+        out = [
+            "# HELP wbs_contacts_total Contacts processed, by outcome.",
+            "# TYPE wbs_contacts_total counter",
+        ]
+        for name in OUTCOMES:
+            out.append(f'wbs_contacts_total{{outcome="{name}"}} {self.counters[name]}')
+        out += [
+            "# HELP wbs_retries_total Send attempts that were retried.",
+            "# TYPE wbs_retries_total counter",
+            f"wbs_retries_total {self.counters.get('retries', 0)}",
+            "# HELP wbs_failures_total Failed send attempts, by failure class.",
+            "# TYPE wbs_failures_total counter",
+        ]
+        for name, value in self.counters.items():
+            if name.startswith("failure_"):
+                out.append(f'wbs_failures_total{{kind="{name[len("failure_"):]}"}} {value}')
+        out += [
+            "# HELP wbs_deliveries_total Sent messages by confirmed delivery state.",
+            "# TYPE wbs_deliveries_total counter",
+        ]
+        for name, value in self.counters.items():
+            if name.startswith("delivery_"):
+                out.append(f'wbs_deliveries_total{{state="{name[len("delivery_"):]}"}} {value}')
+
+        out += [
+            "# HELP wbs_stage_seconds Time spent per send pipeline stage.",
+            "# TYPE wbs_stage_seconds histogram",
+        ]
+        for stage, h in self.stages.items():
+            cumulative = 0
+            for bound, n in zip(BUCKETS, h.bucket_counts):
+                cumulative += n
+                out.append(f'wbs_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            out.append(f'wbs_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+            out.append(f'wbs_stage_seconds_sum{{stage="{stage}"}} {h.sum:.6f}')
+            out.append(f'wbs_stage_seconds_count{{stage="{stage}"}} {h.count}')
+
+        out += [
+            "# HELP wbs_throughput_per_hour Recent contacts completed per hour.",
+            "# TYPE wbs_throughput_per_hour gauge",
+            f"wbs_throughput_per_hour {self.throughput_per_hour():.3f}",
+        ]
+        for name, value in self.gauges.items():
+            out += [f"# TYPE wbs_{name} gauge", f"wbs_{name} {value:.3f}"]
+        return "\n".join(out) + "\n"
+
+    def export(self):
+        self._last_export = time.monotonic()
+        if not self.prometheus_path:
+            return
+        tmp = f"{self.prometheus_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, self.prometheus_path)
+
+    def close(self):
+        self.export()
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
+
+
+def format_eta(seconds) -> str:
+    if seconds is None:
+        return "--"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes = rest // 60
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m {seconds % 60:02d}s"
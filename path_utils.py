@@ -1,9 +1,32 @@
+import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 
+# Persistent Chromium profile folder (WhatsApp login, caches)
+PROFILE_DIR = "browser-profile"
+
 def base_path():
     """Return the base path for resources that works both when running
     as a script and when bundled by PyInstaller (sys.frozen)."""
     if getattr(sys, 'frozen', False):
         return Path(sys._MEIPASS)
     return Path(__file__).parent
+
+@lru_cache(maxsize=None)
+def playwright_browsers_dir():
+    """Locate the ms-playwright folder once per process (None if absent).
+
+    Checked in order: next to app.exe (installed by the installer), inside
+    the one-file bundle (_MEIPASS), then LOCALAPPDATA/HOME (dev mode)."""
+    candidates = []
+    if getattr(sys, 'frozen', False):
+        candidates.append(Path(sys.executable).parent / 'ms-playwright')
+        candidates.append(Path(sys._MEIPASS) / 'ms-playwright')
+    local = os.environ.get('LOCALAPPDATA') or os.environ.get('HOME')
+    if local:
+        candidates.append(Path(local) / 'ms-playwright')
+    for candidate in candidates:
+        if candidate.exists():
+            return candidate
+    return None
@@ -0,0 +1,203 @@
+import re
+
+# E.164: country code + subscriber number, at most 15 digits.
+E164_MIN_DIGITS = 8
+E164_MAX_DIGITS = 15
+
+# Numbers this short are treated as national (no country code): the
+# default country code is prefixed, and without one they are rejected as
+# needing a country code.
+NATIONAL_MAX_DIGITS = 10
+# Shorter digit runs are not taken for a national number at all (invalid)
+NATIONAL_MIN_DIGITS = 6
+
+_NON_DIGIT_OR_PLUS = re.compile(r"[^\d+]")
+
+
+# ------------- SINGLE NUMBER -------------
+
+
+def _split_prefix(raw):
+    """
+    (digits, international): digits of `raw` without a '+' / '00' prefix,
+    and whether it had one.
+    """
+    text = _NON_DIGIT_OR_PLUS.sub("", str(raw).strip())
+    international = text.startswith("+")
+    digits = text.replace("+", "")
+    if not international and digits.startswith("00"):
+        digits = digits[2:]
+        international = True
+    return digits, international
+
+
+def needs_country_code(raw, default_country_code: str = "") -> bool:
+    """
+    True for a national number (no '+' / '00'; a trunk '0' or at most
+    NATIONAL_MAX_DIGITS digits) when no default country code is set:
+    "9876543210" could be +91 98765 43210 or a +98 number, so it is never
+    guessed.
+    """
+    if raw is None or re.sub(r"\D", "", str(default_country_code or "")):
+        return False
+    digits, international = _split_prefix(raw)
+    return (
+        not international
+        and len(digits) >= NATIONAL_MIN_DIGITS
+        and (digits.startswith("0") or len(digits) <= NATIONAL_MAX_DIGITS)
+    )
+
+
+def normalize_phone(raw, default_country_code: str = ""):
+    """
+    Normalize one phone number to E.164 digits (no leading '+'), the form
+    wa.me / web.whatsapp.com expect. Returns None if it cannot be valid,
+    or it needs a country code (see needs_country_code()).
+
+    "+91 98765-43210", "0091 (98765) 43210" and, with default country
+    code "91", "098765 43210" or "9876543210" all become "919876543210".
+    """
+    if raw is None:
+        return None
+    cc = re.sub(r"\D", "", str(default_country_code or ""))
+    if needs_country_code(raw, cc):
+        return None
+    digits, international = _split_prefix(raw)
+
+    if not international and cc:
+        if digits.startswith("0"):
+            digits = cc + digits.lstrip("0")
+        elif len(digits) <= NATIONAL_MAX_DIGITS:
+            digits = cc + digits
+
+    if (
+        not digits
+        or digits.startswith("0")
+        or not E164_MIN_DIGITS <= len(digits) <= E164_MAX_DIGITS
+    ):
+        return None
+    return digits
+
+
+# ------------- WHOLE COLUMN -------------
+
+
+def normalize_phones(values, default_country_code: str = ""):
+    """
+    Vectorized normalize_phone() over a whole column.
+    Returns a pandas Series of E.164 digit strings, <NA> where invalid or
+    needing a country code.
+    """
+    return _normalize_phones(values, default_country_code)[0]
+
+
+def _normalize_phones(values, default_country_code: str = ""):
+    """
+    (normalized Series, boolean Series of rows needing a country code)
+    """
+    import pandas as pd
+
+    cc = re.sub(r"\D", "", str(default_country_code or ""))
+    s = pd.Series(values, dtype="string").str.strip()
+    s = s.str.replace(_NON_DIGIT_OR_PLUS.pattern, "", regex=True)
+
+    international = s.str.startswith("+")
+    digits = s.str.replace("+", "", regex=False)
+
+    idd = ~international & digits.str.startswith("00")
+    digits = digits.mask(idd, digits.str.slice(2))
+    international = international | idd
+
+    national = ~international
+    if cc:
+        trunk = national & digits.str.startswith("0")
+        digits = digits.mask(trunk, cc + digits.str.lstrip("0"))
+        short = national & ~trunk & (digits.str.len() <= NATIONAL_MAX_DIGITS)
+        digits = digits.mask(short, cc + digits)
+        no_cc = pd.Series(False, index=digits.index)
+    else:
+        lengths = digits.str.len()
+        no_cc = (
+            national
+            & (lengths >= NATIONAL_MIN_DIGITS)
+            & (digits.str.startswith("0") | (lengths <= NATIONAL_MAX_DIGITS))
+        ).fillna(False).astype(bool)
+
+    lengths = digits.str.len()
+    valid = (
+        (digits != "")
+        & ~digits.str.startswith("0")
+        & (lengths >= E164_MIN_DIGITS)
+        & (lengths <= E164_MAX_DIGITS)
+    )
+    return digits.where(valid.fillna(False) & ~no_cc), no_cc
+
+
+# ------------- PRE-FLIGHT -------------
+
+
+class PreflightResult:
+    """
+    Outcome of the pre-flight pass.
+
+    - phones: list aligned with data rows; the normalized number for rows
+              that should be sent, None for invalid, duplicate or
+              country-code-less rows
+    - report: counts for the summary shown before the run
+    """
+
+    def __init__(self, phones: list, report: dict):
+        self.phones = phones
+        self.report = report
+
+    def summary(self) -> str:
+        r = self.report
+        lines = [
+            f"Pre-flight: {r['total']} rows, {r['sendable']} sendable, "
+            f"{r['invalid']} invalid, {r['duplicates']} duplicates."
+        ]
+        if r["invalid_examples"]:
+            examples = ", ".join(
+                f"row {row}: {raw!r}" for row, raw in r["invalid_examples"]
+            )
+            lines.append(f"   Invalid examples: {examples}")
+        if r["needs_country_code"]:
+            examples = ", ".join(
+                f"row {row}: {raw!r}" for row, raw in r["country_code_examples"]
+            )
+            lines.append(
+                f"   {r['needs_country_code']} numbers have no country code and will be "
+                f"skipped; set a default country code or write them with '+' "
+                f"(e.g. {examples})"
+            )
+        return "\n".join(lines)
+
+
+def preflight(raw_phones: list, default_country_code: str = "", examples: int = 5):
+    """
+    Normalize the whole phone column at once, drop invalid numbers,
+    national numbers when no default country code is set, and in-file
+    duplicates (first occurrence wins), and build a summary report.
+    """
+    normalized, no_cc = _normalize_phones(raw_phones, default_country_code)
+    dropped = normalized.isna()
+    invalid = dropped & ~no_cc
+    duplicate = ~dropped & normalized.duplicated(keep="first")
+    keep = ~dropped & ~duplicate
+
+    invalid_rows = invalid[invalid].index[:examples]
+    no_cc_rows = no_cc[no_cc].index[:examples]
+    report = {
+        "total": len(normalized),
+        "sendable": int(keep.sum()),
+        "invalid": int(invalid.sum()),
+        "needs_country_code": int(no_cc.sum()),
+        "duplicates": int(duplicate.sum()),
+        # 1-based row numbers as shown in the spreadsheet's data rows
+        "invalid_examples": [(int(r) + 1, raw_phones[r]) for r in invalid_rows],
+        "country_code_examples": [(int(r) + 1, raw_phones[r]) for r in no_cc_rows],
+    }
+
+    phones = normalized.where(keep).astype(object)
+    phones = phones.where(phones.notna(), None).tolist()
+    return PreflightResult(phones, report)
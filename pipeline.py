@@ -0,0 +1,212 @@
+import asyncio
+import itertools
+import time
+from typing import NamedTuple
+
+from contacts import iter_contacts
+from phones import needs_country_code, normalize_phone
+from templates import compile_template, render_messages
+
+# Contacts prepared ahead of the send stage
+PREFETCH = 32
+# Rows read, and their messages rendered in one vectorized pass, per turn
+# before the producer yields to the event loop
+PRODUCER_SLICE = 64
+
+
+class Prepared(NamedTuple):
+    """
+    One contact, ready for the send stage. `skip` is None for a contact
+    to send, else (journal outcome, log line or None); skips still pass
+    through the queue so the journal and results are written in row order.
+    """
+
+    index: int
+    phone: str
+    name: str
+    msg: str
+    skip: tuple = None
+
+
+class ContactProducer:
+    """
+    Producer half of send_batch: streams rows, turns rows without a phone
+    to send into skips (invalid, needs_country_code, duplicate_in_file,
+    suppressed), checks the ledger (already sent / known bad), renders the
+    messages, and keeps up to `prefetch` contacts queued. Rows are read in
+    slices of PRODUCER_SLICE whose messages are rendered in one vectorized
+    pass (templates.render_messages). It runs while the send stage waits on
+    the browser or sleeps through its pacing delay.
+
+    `phones` is the send list (None for rows not to send); `normalized` the
+    pre-flight numbers before suppression, so suppressed rows are reported
+    with their number.
+
+        producer = ContactProducer(...).start()
+        try:
+            async for item in producer:
+                ...
+        finally:
+            await producer.close()
+    """
+
+    def __init__(
+        self,
+        excel_path,
+        start_index: int,
+        phones,
+        template,
+        columns,
+        ledger,
+        skip_delivered: bool = True,
+        skip_bad_numbers: bool = True,
+        bad_number_ttl_days: float = 90,
+        metrics=None,
+        on_warning=None,
+        prefetch: int = PREFETCH,
+        normalized=None,
+        default_country_code: str = "",
+    ):
+        self.excel_path = excel_path
+        self.start_index = start_index
+        self.phones = phones
+        self.template = template
+        self.columns = columns
+        self.ledger = ledger
+        self.skip_delivered = skip_delivered
+        self.skip_bad_numbers = skip_bad_numbers
+        self.bad_number_ttl_days = bad_number_ttl_days
+        self.metrics = metrics
+        self.on_warning = on_warning
+        self.normalized = normalized
+        self.default_country_code = default_country_code
+        self.queue = asyncio.Queue(maxsize=max(int(prefetch), 1))
+        self.task = None
+        self._warned_templates = set()
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self._produce())
+        return self
+
+    async def close(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    # ---- producer ----
+
+    def drop(self, i: int, rec: dict) -> Prepared:
+        """
+        Skip for a row dropped before the run: suppressed (an opt-out),
+        invalid, without a country code, or a repeat of an earlier row's
+        number. No log line; the
+        pre-flight summary already counted them.
+        """
+        name = (rec.get("name") or "").strip()
+        phone = self.normalized[i] if self.normalized is not None else None
+        if phone:
+            return Prepared(i, phone, name, "", ("suppressed", None))
+        raw = rec.get("phone")
+        phone = normalize_phone(raw, self.default_country_code)
+        if phone is None:
+            outcome = (
+                "needs_country_code"
+                if needs_country_code(raw, self.default_country_code)
+                else "invalid"
+            )
+            return Prepared(i, "" if raw is None else str(raw), name, "", (outcome, None))
+        return Prepared(i, phone, name, "", ("duplicate_in_file", None))
+
+    def prepare(self, i: int, rec: dict, phone: str, msg: str = None) -> Prepared:
+        """
+        `msg` is the row's message if already rendered in bulk; otherwise
+        it is rendered here.
+        """
+        name = (rec.get("name") or "").strip()
+
+        if self.skip_delivered and self.ledger.already_sent(phone):
+            return Prepared(
+                i, phone, name, "",
+                ("duplicate", f"↷ Already messaged {phone} (row {i + 1}); skipping."),
+            )
+        if self.skip_bad_numbers:
+            reason = self.ledger.bad_reason(phone, self.bad_number_ttl_days)
+            if reason:
+                return Prepared(
+                    i, phone, name, "",
+                    ("bad_number", f"↷ {phone} is known bad ({reason}, row {i + 1}); skipping."),
+                )
+
+        # Build personalized message
+        custom = (rec.get("message") or "").strip() if "message" in rec else ""
+        msg_template = compile_template(custom) if custom else self.template
+        if custom and custom not in self._warned_templates:
+            self._warned_templates.add(custom)
+            row_missing = msg_template.missing_columns(self.columns)
+            if row_missing and self.on_warning is not None:
+                self.on_warning(
+                    f"⚠ Row {i + 1} message uses missing columns: "
+                    f"{', '.join(row_missing)} (left blank)"
+                )
+        return Prepared(i, phone, name, msg if msg is not None else msg_template.render(rec))
+
+    def render_slice(self, rows: list) -> dict:
+        """
+        Messages of the sendable rows among (index, row) pairs, rendered in
+        one vectorized pass; {index: message}.
+        """
+        import pandas as pd
+
+        sendable = [(i, rec) for i, rec in rows if self.phones[i]]
+        if not sendable:
+            return {}
+        started = time.monotonic()
+        df = pd.DataFrame.from_records(
+            [rec for _, rec in sendable], index=[i for i, _ in sendable]
+        )
+        messages = render_messages(df, self.template).to_dict()
+        if self.metrics is not None:
+            self.metrics.observe("render", time.monotonic() - started, sendable[0][0])
+        return messages
+
+    async def _produce(self):
+        phones = self.phones
+        try:
+            rows = enumerate(iter_contacts(self.excel_path, self.start_index), self.start_index)
+            rows = itertools.takewhile(lambda row: row[0] < len(phones), rows)
+            while True:
+                chunk = list(itertools.islice(rows, PRODUCER_SLICE))
+                if not chunk:
+                    break
+                messages = self.render_slice(chunk)
+                for i, rec in chunk:
+                    if not phones[i]:
+                        await self.queue.put(self.drop(i, rec))
+                        continue
+                    started = time.monotonic()
+                    item = self.prepare(i, rec, phones[i], messages[i])
+                    if self.metrics is not None:
+                        self.metrics.observe("prepare", time.monotonic() - started, i)
+                    await self.queue.put(item)
+                # Long runs of invalid rows: let the send stage run
+                await asyncio.sleep(0)
+        except Exception as e:
+            await self.queue.put(e)
+            return
+        await self.queue.put(None)
+
+    # ---- consumer ----
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Prepared:
+        item = await self.queue.get()
+        if item is None:
+            raise StopAsyncIteration
+        if isinstance(item, Exception):
+            raise item
+        return item
@@ -0,0 +1,147 @@
+import logging
+import threading
+from logging.handlers import RotatingFileHandler
+
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+
+from metrics import format_eta
+
+LOG_FILE = "sender.log"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 5
+
+# UI is updated at most this often, however fast events arrive
+FLUSH_INTERVAL_MS = 100
+
+
+def file_logger(path: str = LOG_FILE) -> logging.Logger:
+    """
+    Logger writing the full run log to a rotating file
+    (the on-screen view only keeps the most recent lines).
+    """
+    logger = logging.getLogger("whatsapp_sender")
+    if not logger.handlers:
+        handler = RotatingFileHandler(
+            path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+class QtReporter(QObject):
+    """
+    Thread-safe bridge between the sender thread and the dashboard
+    (the dashboard's reporter.Reporter).
+
+    The sender calls append_log / set_progress / set_maximum / set_status /
+    set_metrics from its own thread. Those only queue the event under a lock; the first
+    event after an idle period emits a signal, which Qt delivers to the GUI
+    thread, where a short timer then applies everything queued so far in
+    one batch (one appendPlainText, the latest progress, status and metrics).
+    """
+
+    _wake = Signal()
+    # Emitted (from any thread) when the campaign task has ended
+    finished = Signal()
+
+    def __init__(self, window, interval_ms: int = FLUSH_INTERVAL_MS, log_file=LOG_FILE):
+        # Must be created on the GUI thread so the slots run there
+        super().__init__()
+        self._window = window
+        self._lock = threading.Lock()
+        self._lines = []
+        self._progress = None
+        self._maximum = None
+        self._status = None
+        self._metrics = None
+        self._pending = False
+        self._file_log = file_logger(log_file)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._flush)
+        self._wake.connect(self._on_wake)
+
+    # ---- STOP flag, read by sender.should_stop() ----
+
+    @property
+    def _running(self):
+        return getattr(self._window, "_running", True)
+
+    # ---- sender-side API (any thread) ----
+
+    def append_log(self, text: str):
+        self._file_log.info(text)
+        self._post(lines=text)
+
+    def set_progress(self, value: int):
+        self._post(progress=value)
+
+    def set_maximum(self, maximum: int):
+        self._post(maximum=maximum)
+
+    def set_status(self, text: str):
+        self._post(status=text)
+
+    def set_metrics(self, snapshot: dict):
+        self._post(metrics=snapshot)
+
+    def _post(self, lines=None, progress=None, maximum=None, status=None, metrics=None):
+        with self._lock:
+            if lines is not None:
+                self._lines.append(lines)
+            if progress is not None:
+                self._progress = progress
+            if maximum is not None:
+                self._maximum = maximum
+            if status is not None:
+                self._status = status
+            if metrics is not None:
+                self._metrics = metrics
+            wake = not self._pending
+            self._pending = True
+        if wake:
+            self._wake.emit()
+
+    # ---- GUI thread ----
+
+    @Slot()
+    def _on_wake(self):
+        if not self._timer.isActive():
+            self._timer.start()
+
+    @Slot()
+    def _flush(self):
+        with self._lock:
+            lines, self._lines = self._lines, []
+            progress, self._progress = self._progress, None
+            maximum, self._maximum = self._maximum, None
+            status, self._status = self._status, None
+            metrics, self._metrics = self._metrics, None
+            self._pending = False
+
+        w = self._window
+        if lines:
+            w.log.appendPlainText("\n".join(lines))
+        if maximum is not None:
+            w.progress.setMaximum(maximum)
+        if progress is not None:
+            w.progress.setValue(progress)
+        if status is not None:
+            w.status_lbl.setText(status)
+        if metrics is not None:
+            w.metrics_lbl.setText(
+                f"Sent {metrics['sent']} · Failed {metrics['failed']} · "
+                f"Retries {metrics['retries']} · Skipped {metrics['skipped']} · "
+                f"{metrics['throughput_per_hour']:.0f}/h · "
+                f"ETA {format_eta(metrics['eta_seconds'])}"
+                + (
+                    f" · Confirmed {metrics['delivery_confirmed']}"
+                    if "delivery_confirmed" in metrics
+                    else ""
+                )
+            )
@@ -0,0 +1,85 @@
+import json
+import sys
+import threading
+import time
+from typing import Protocol, runtime_checkable
+
+
+@runtime_checkable
+class Reporter(Protocol):
+    """
+    What send_batch reports through (its `gui` argument). Called from the
+    sender's thread, so implementations must be thread-safe and must not
+    block on slow consumers.
+
+    - append_log(text): one human-readable line
+    - set_maximum(n) / set_progress(value): contacts-file progress
+    - set_status(text): one-line current state ("Paused", "Idle", ...)
+    - set_metrics(snapshot): metrics.SendMetrics.snapshot() dict
+
+    An optional `_running` attribute is polled as a STOP flag
+    (see sender.should_stop); cancelling the task works for any reporter.
+
+    Implementations: qt_reporter.QtReporter (dashboard),
+    JsonLinesReporter (CLI / scheduled jobs).
+    """
+
+    def append_log(self, text: str) -> None: ...
+
+    def set_progress(self, value: int) -> None: ...
+
+    def set_maximum(self, maximum: int) -> None: ...
+
+    def set_status(self, text: str) -> None: ...
+
+    def set_metrics(self, snapshot: dict) -> None: ...
+
+
+def gui_append(gui, msg: str):
+    """
+    Log a line. `gui` is a Reporter that is safe to call from the sender
+    thread; without one, print.
+    """
+    try:
+        gui.append_log(msg)
+    except Exception:
+        print(msg)
+
+
+class JsonLinesReporter:
+    """
+    Writes every event as one JSON object per line, e.g.
+
+        {"ts": 1718000000.123, "type": "log", "text": "➡ Sending to ..."}
+        {"ts": 1718000000.456, "type": "progress", "value": 42}
+
+    Types: log, maximum, progress, status, metrics, done.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def _emit(self, type_: str, **fields):
+        line = json.dumps({"ts": round(time.time(), 3), "type": type_, **fields})
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def append_log(self, text: str):
+        self._emit("log", text=text)
+
+    def set_progress(self, value: int):
+        self._emit("progress", value=value)
+
+    def set_maximum(self, maximum: int):
+        self._emit("maximum", value=maximum)
+
+    def set_status(self, text: str):
+        self._emit("status", text=text)
+
+    def set_metrics(self, snapshot: dict):
+        self._emit("metrics", **snapshot)
+
+    def done(self, ok: bool, error: str = None):
+        self._emit("done", ok=ok, error=error)
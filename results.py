@@ -0,0 +1,256 @@
+"""
+Per-contact results of a campaign, streamed to CSV or Parquet while it
+runs, and a summary of any number of result files.
+
+    python results.py results/*.csv
+"""
+
+import argparse
+import csv
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# send_batch writes one file per run into this folder by default
+RESULTS_DIR = "results"
+
+RESULT_COLUMNS = (
+    "row",          # 1-based row in the contacts file
+    "phone",
+    "name",
+    "status",       # sent / failed / duplicate / bad_number / suppressed /
+                    # invalid / needs_country_code / duplicate_in_file
+    "attempts",
+    "started_at",   # local time, ISO 8601
+    "seconds",      # time spent on the contact, pacing delay excluded
+    "error_class",  # failures.py class of the last failed attempt
+    "error",
+)
+# Rows per Parquet row group; all the writer ever keeps in memory
+ROW_GROUP_ROWS = 1024
+# Error messages are cut to this length
+MAX_ERROR_CHARS = 300
+
+RESULT_FORMATS = (".csv", ".parquet")
+
+
+def results_file(path, excel_path) -> Path:
+    """
+    A .csv / .parquet path is used as given; anything else is a folder that
+    gets "<contacts file stem>-<YYYYmmdd-HHMMSS>.csv".
+    """
+    path = Path(path)
+    if path.suffix.lower() in RESULT_FORMATS:
+        return path
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return path / f"{Path(excel_path).stem}-{stamp}.csv"
+
+
+class ResultsWriter:
+    """
+    Appends one row per contact outcome.
+
+    - CSV: appended to (header written once) and flushed per row, so the
+      file is readable while the campaign runs
+    - Parquet: written in row groups of `row_group_rows`; an existing file
+      is replaced, and the file is only readable after close()
+    """
+
+    def __init__(self, path, row_group_rows: int = ROW_GROUP_ROWS):
+        self.path = Path(path)
+        self.format = self.path.suffix.lower()
+        if self.format not in RESULT_FORMATS:
+            raise ValueError(f"Results file must be one of: {', '.join(RESULT_FORMATS)}")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.row_group_rows = max(int(row_group_rows), 1)
+        self.rows = 0
+
+        if self.format == ".csv":
+            new = not self.path.exists() or self.path.stat().st_size == 0
+            self._fh = open(self.path, "a", encoding="utf-8", newline="")
+            self._csv = csv.writer(self._fh)
+            if new:
+                self._csv.writerow(RESULT_COLUMNS)
+                self._fh.flush()
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            self._schema = pa.schema(
+                [
+                    ("row", pa.int64()),
+                    ("phone", pa.string()),
+                    ("name", pa.string()),
+                    ("status", pa.string()),
+                    ("attempts", pa.int32()),
+                    ("started_at", pa.string()),
+                    ("seconds", pa.float64()),
+                    ("error_class", pa.string()),
+                    ("error", pa.string()),
+                ]
+            )
+            self._pq = pq.ParquetWriter(self.path, self._schema)
+            self._batch = {c: [] for c in RESULT_COLUMNS}
+
+    def write(
+        self,
+        row: int,
+        phone: str,
+        name: str,
+        status: str,
+        attempts: int = 0,
+        started_at: float = None,
+        seconds: float = None,
+        error_class: str = None,
+        error=None,
+    ):
+        """
+        `started_at` is a time.time() value; `error` an exception or text.
+        """
+        values = (
+            row,
+            phone,
+            name or "",
+            status,
+            attempts,
+            datetime.fromtimestamp(started_at if started_at is not None else time.time())
+            .isoformat(timespec="seconds"),
+            round(seconds, 3) if seconds is not None else None,
+            error_class,
+            str(error)[:MAX_ERROR_CHARS] if error is not None else None,
+        )
+        self.rows += 1
+        if self.format == ".csv":
+            self._csv.writerow(["" if v is None else v for v in values])
+            self._fh.flush()
+            return
+        for column, value in zip(RESULT_COLUMNS, values):
+            self._batch[column].append(value)
+        if len(self._batch["row"]) >= self.row_group_rows:
+            self._write_group()
+
+    def _write_group(self):
+        import pyarrow as pa
+
+        if self._batch["row"]:
+            self._pq.write_table(pa.Table.from_pydict(self._batch, schema=self._schema))
+            self._batch = {c: [] for c in RESULT_COLUMNS}
+
+    def close(self):
+        if self.format == ".csv":
+            if not self._fh.closed:
+                self._fh.close()
+        elif self._pq is not None:
+            self._write_group()
+            self._pq.close()
+            self._pq = None
+
+
+# ------------- SUMMARY -------------
+
+
+def _read_results(paths):
+    """
+    Only the columns the summary needs; status / error class as categories
+    so millions of rows stay small.
+    """
+    import pandas as pd
+
+    columns = ["status", "started_at", "seconds", "error_class"]
+    frames = []
+    for path in paths:
+        if Path(path).suffix.lower() == ".parquet":
+            frames.append(pd.read_parquet(path, columns=columns))
+        else:
+            frames.append(
+                pd.read_csv(
+                    path,
+                    usecols=columns,
+                    dtype={"status": "category", "error_class": "category"},
+                )
+            )
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    df = pd.concat(frames, ignore_index=True)
+    df["status"] = df["status"].astype("category")
+    df["error_class"] = df["error_class"].astype("category")
+    return df
+
+
+def summarize(paths) -> dict:
+    """
+    Aggregate result files: outcome counts, success rate (sent out of
+    sent + failed), failures by class, sent messages per hour and
+    per-contact timing.
+    """
+    import pandas as pd
+
+    df = _read_results([paths] if isinstance(paths, (str, Path)) else list(paths))
+    status = df["status"].astype(str)
+    is_sent = status == "sent"
+    is_failed = status == "failed"
+    sent = int(is_sent.sum())
+    failed = int(is_failed.sum())
+
+    started = pd.to_datetime(df["started_at"], format="ISO8601", errors="coerce")
+    sent_at = started[is_sent].dropna()
+    per_hour = sent_at.dt.floor("h").value_counts().sort_index()
+    if len(sent_at) >= 2:
+        hours = (sent_at.max() - sent_at.min()).total_seconds() / 3600
+    else:
+        hours = 0.0
+
+    seconds = pd.to_numeric(df["seconds"], errors="coerce")[is_sent].dropna()
+    return {
+        "total": len(df),
+        "sent": sent,
+        "failed": failed,
+        "skipped": len(df) - sent - failed,
+        "success_rate": sent / (sent + failed) if sent + failed else None,
+        "failures": (
+            df["error_class"][is_failed].astype(str).replace("nan", "unknown")
+            .value_counts().to_dict()
+        ),
+        "skips": status[~(is_sent | is_failed)].value_counts().to_dict(),
+        "sent_per_hour": sent / hours if hours > 0 else None,
+        "hourly": {ts.isoformat(timespec="minutes"): int(n) for ts, n in per_hour.items()},
+        "seconds_p50": float(seconds.quantile(0.5)) if len(seconds) else None,
+        "seconds_p95": float(seconds.quantile(0.95)) if len(seconds) else None,
+    }
+
+
+def summary_lines(summary: dict) -> list:
+    s = summary
+    rate = f"{s['success_rate']:.1%}" if s["success_rate"] is not None else "n/a"
+    lines = [
+        f"📊 {s['total']} contacts: sent {s['sent']}, failed {s['failed']}, "
+        f"skipped {s['skipped']} (success rate {rate})",
+    ]
+    if s["failures"]:
+        lines.append(
+            "   failures: " + ", ".join(f"{k} {v}" for k, v in s["failures"].items() if v)
+        )
+    if s["skips"]:
+        lines.append("   skipped: " + ", ".join(f"{k} {v}" for k, v in s["skips"].items() if v))
+    if s["sent_per_hour"] is not None:
+        lines.append(
+            f"   throughput: {s['sent_per_hour']:.1f} sent/h over {len(s['hourly'])} hour(s), "
+            f"p50 {s['seconds_p50']:.1f}s / p95 {s['seconds_p95']:.1f}s per contact"
+        )
+    for hour, n in s["hourly"].items():
+        lines.append(f"   {hour}  {n}")
+    return lines
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Summarize campaign result files.")
+    ap.add_argument("paths", nargs="+", help="results .csv / .parquet files")
+    args = ap.parse_args(argv)
+    for line in summary_lines(summarize(args.paths)):
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
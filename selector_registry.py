@@ -0,0 +1,193 @@
+import os
+import time
+from pathlib import Path
+
+from journal import read_json, write_json_atomic
+from path_utils import base_path
+
+SELECTORS_FILE = "selectors.json"
+# Which candidate last worked per element, kept between runs
+WINNERS_FILE = "selector-cache.json"
+
+# How often (seconds) the config file's mtime is checked for edits
+RELOAD_CHECK_INTERVAL = 2.0
+
+
+def default_selectors_path() -> Path:
+    """
+    selectors.json in the working folder (editable next to app.exe),
+    else the copy shipped with the app.
+    """
+    local = Path(SELECTORS_FILE)
+    return local if local.exists() else base_path() / SELECTORS_FILE
+
+
+class SelectorRegistry:
+    """
+    Candidate CSS selectors per UI element, from a versioned JSON file:
+
+        {"version": 1, "elements": {"attach": ["span[data-icon='clip']", ...]}}
+
+    - the candidate that last matched is tried first (and remembered
+      across runs in WINNERS_FILE)
+    - the file is re-read when its mtime changes, so a fixed selector can
+      be dropped in while a campaign is running
+    - misses (no candidate matched) and fallbacks (the remembered winner
+      failed, a later candidate matched) are counted per element
+    """
+
+    def __init__(self, path=None, winners_path=WINNERS_FILE):
+        self.path = Path(path) if path else None
+        self.winners_path = winners_path
+        self.version = None
+        self.elements = {}
+        self.winners = {}
+        self.misses = {}
+        self.fallbacks = {}
+        self.metrics = None
+        self._mtime = None
+        self._checked = 0.0
+
+    # ---- config ----
+
+    def _load(self):
+        path = self.path or default_selectors_path()
+        data = read_json(path)
+        if not data or not isinstance(data.get("elements"), dict):
+            raise ValueError(f"{path}: missing, or not a selector config with an 'elements' map")
+        elements = {
+            name: [c for c in candidates if isinstance(c, str) and c.strip()]
+            for name, candidates in data["elements"].items()
+        }
+        # Forget winners that are no longer listed
+        self.winners = {
+            name: w for name, w in self.winners.items() if w in elements.get(name, ())
+        }
+        self.elements = elements
+        self.version = data.get("version")
+        self._mtime = os.stat(path).st_mtime
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if self._mtime is not None and now - self._checked < RELOAD_CHECK_INTERVAL:
+            return
+        self._checked = now
+        if self._mtime is None:
+            if self.winners_path:
+                saved = read_json(self.winners_path) or {}
+                self.winners = saved.get("winners", {})
+            self._load()
+            return
+        try:
+            mtime = os.stat(self.path or default_selectors_path()).st_mtime
+        except OSError:
+            return  # keep the last good config
+        if mtime != self._mtime:
+            try:
+                self._load()
+            except (OSError, ValueError):
+                pass  # half-written edit; retry on the next check
+
+    def candidates(self, element: str) -> list:
+        """
+        Selectors for `element`, last winner first.
+        """
+        self._maybe_reload()
+        listed = self.elements.get(element)
+        if not listed:
+            raise KeyError(f"No selectors configured for '{element}'")
+        winner = self.winners.get(element)
+        if winner in listed:
+            return [winner] + [c for c in listed if c != winner]
+        return list(listed)
+
+    def has(self, element: str) -> bool:
+        self._maybe_reload()
+        return bool(self.elements.get(element))
+
+    def combined(self, element: str) -> str:
+        """
+        All candidates as one selector list, for a single DOM wait.
+        """
+        return ", ".join(self.candidates(element))
+
+    # ---- outcome bookkeeping ----
+
+    def _hit(self, element, selector, position):
+        if position:
+            self.fallbacks[element] = self.fallbacks.get(element, 0) + 1
+            self._gauge("fallbacks", element, self.fallbacks[element])
+        self.winners[element] = selector
+
+    def record_miss(self, element):
+        self.misses[element] = self.misses.get(element, 0) + 1
+        self._gauge("misses", element, self.misses[element])
+
+    def _gauge(self, kind, element, value):
+        if self.metrics is not None:
+            self.metrics.set_gauge(f"selector_{kind}_{element}", value)
+
+    # ---- page helpers ----
+
+    async def query(self, page, element: str, record_miss: bool = True):
+        """
+        First element matched by any candidate (winner first), or None.
+        Probes for things that are normally absent (error dialogs) pass
+        record_miss=False.
+        """
+        for position, selector in enumerate(self.candidates(element)):
+            try:
+                el = await page.query_selector(selector)
+            except Exception:
+                continue  # invalid selector in the config
+            if el is not None:
+                self._hit(element, selector, position)
+                return el
+        if record_miss:
+            self.record_miss(element)
+        return None
+
+    async def wait(
+        self, page, element: str, timeout_seconds: float, state="visible", also=()
+    ):
+        """
+        Wait once for any candidate, then resolve in priority order.
+        Returns (element or None, seconds waited).
+
+        `also` lists other elements (e.g. error dialogs) that end the wait
+        early; the result is then None and recording the miss is left to
+        the caller, who knows whether it was one.
+        """
+        started = time.monotonic()
+        selector = ", ".join(
+            self.combined(e) for e in (element, *also) if e == element or self.has(e)
+        )
+        try:
+            await page.wait_for_selector(
+                selector, state=state, timeout=timeout_seconds * 1000
+            )
+        except Exception:
+            # Timeout, or an invalid candidate broke the combined selector
+            if not also:
+                self.record_miss(element)
+            return None, time.monotonic() - started
+        el = await self.query(page, element, record_miss=not also)
+        return el, time.monotonic() - started
+
+    # ---- reporting ----
+
+    def summary_lines(self) -> list:
+        lines = []
+        for element in sorted(set(self.misses) | set(self.fallbacks)):
+            lines.append(
+                f"   selector '{element}': {self.misses.get(element, 0)} misses, "
+                f"{self.fallbacks.get(element, 0)} fallbacks "
+                f"(now using {self.winners.get(element, '-')})"
+            )
+        return lines
+
+    def save(self):
+        if self.winners_path and self.winners:
+            write_json_atomic(
+                self.winners_path, {"version": self.version, "winners": self.winners}
+            )
@@ -1,34 +1,68 @@
 import asyncio
 import random
-import json
 import os
-import sys
 import time
-from datetime import date
+from datetime import date, datetime
 from pathlib import Path
 
-import pandas as pd
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from playwright.async_api import async_playwright
 
+from attachments import prepare_attachments
+from browser_resources import ResourceManager
+from delivery import DeliveryTracker
+from failures import (
+    FAILURE_ELEMENTS,
+    INVALID_NUMBER,
+    NETWORK,
+    POLICIES,
+    SELECTOR_MISS,
+    UNKNOWN,
+    SendFailure,
+    backoff_seconds,
+    classify_exception,
+    detect_failure,
+)
+from contacts_cache import CONTACTS_CACHE_DIR, load_contacts
+from journal import ProgressJournal, write_json_atomic
+from ledger import LEDGER_FILE, DeliveryLedger
+from metrics import PROMETHEUS_FILE, TRACE_FILE, SendMetrics
+from path_utils import playwright_browsers_dir
+from pipeline import ContactProducer
+from reporter import gui_append
+from results import RESULTS_DIR, ResultsWriter, results_file
+from selector_registry import SelectorRegistry
+from suppression import SUPPRESSION_DIR, SuppressionIndex
+from templates import compile_template
+
+WHATSAPP_URL = "https://web.whatsapp.com"
 STATE_FILE = "state.json"
 
+# UI element selectors live in selectors.json (see selector_registry);
+# edits to that file are picked up while a campaign runs.
+SELECTORS = SelectorRegistry()
+
+# How the message text is put into the composer, see enter_message()
+ENTRY_MODES = ("insert", "paste", "type")
+# How each chat is opened, see open_chat_in_app()
+NAVIGATION_MODES = ("in_app", "reload")
+# After this many in-app misses in a row, use full reloads for the run
+IN_APP_MAX_FAILURES = 3
+
 
 # ------------- STATE HELPERS -------------
 
 
-def load_state():
-    if os.path.exists(STATE_FILE):
-        try:
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
+def load_state(path=STATE_FILE):
+    """
+    Current progress state: the state.json snapshot with the
+    state.json.journal records replayed on top.
+    """
+    return ProgressJournal(path).load()
 
 
-def save_state(state: dict) -> None:
-    with open(STATE_FILE, "w", encoding="utf-8") as f:
-        json.dump(state, f, indent=2)
+def save_state(state: dict, path=STATE_FILE) -> None:
+    write_json_atomic(path, state)
 
 
 # ------------- ENV / PATH CONFIG -------------
@@ -43,31 +77,20 @@ def configure_playwright_browsers_path(gui=None):
           ms-playwright/   <-- bundled here by installer
 
     - In dev mode, we fall back to LOCALAPPDATA/HOME/ms-playwright.
+
+    The lookup is cached (path_utils.playwright_browsers_dir), so repeated
+    campaigns do not touch the disk again.
     """
-    browsers_dir = None
-
-    # EXE case
-    if getattr(sys, "frozen", False):
-        app_dir = Path(sys.executable).parent
-        candidate = app_dir / "ms-playwright"
-        if candidate.exists():
-            browsers_dir = candidate
-
-    # Dev fallback
-    if browsers_dir is None:
-        local = os.environ.get("LOCALAPPDATA") or os.environ.get("HOME")
-        if local:
-            candidate = Path(local) / "ms-playwright"
-            if candidate.exists():
-                browsers_dir = candidate
+    browsers_dir = playwright_browsers_dir()
 
     if browsers_dir is not None:
         os.environ["PLAYWRIGHT_BROWSERS_PATH"] = str(browsers_dir)
         if gui is not None:
-            gui.log.append(f"Using Playwright browsers from: {browsers_dir}")
+            gui_append(gui, f"Using Playwright browsers from: {browsers_dir}")
     else:
         if gui is not None:
-            gui.log.append(
+            gui_append(
+                gui,
                 "WARNING: ms-playwright folder not found. "
                 "PLAYWRIGHT_BROWSERS_PATH not set; browser launch may fail."
             )
@@ -84,11 +107,43 @@ def should_stop(gui) -> bool:
     return hasattr(gui, "_running") and not getattr(gui, "_running")
 
 
-def gui_append(gui, msg: str):
+def gui_progress(gui, value=None, maximum=None):
+    try:
+        if maximum is not None:
+            gui.set_maximum(maximum)
+        if value is not None:
+            gui.set_progress(value)
+    except Exception:
+        pass
+
+
+def gui_status(gui, text: str):
+    try:
+        gui.set_status(text)
+    except Exception:
+        pass
+
+
+def gui_metrics(gui, snapshot: dict):
     try:
-        gui.log.append(msg)
+        gui.set_metrics(snapshot)
     except Exception:
-        print(msg)
+        pass
+
+
+async def wait_for_selector(page, selector: str, timeout_seconds: float, state="visible"):
+    """
+    Wait on the DOM (Playwright's selector waiting, no polling loop).
+    Returns (element or None on timeout, seconds waited).
+    """
+    started = time.monotonic()
+    try:
+        el = await page.wait_for_selector(
+            selector, state=state, timeout=timeout_seconds * 1000
+        )
+    except PlaywrightTimeoutError:
+        el = None
+    return el, time.monotonic() - started
 
 
 async def wait_for_login(page, gui, timeout_seconds: int = 120):
@@ -96,48 +151,311 @@ async def wait_for_login(page, gui, timeout_seconds: int = 120):
     Wait until WhatsApp Web is logged in (QR scanned).
     """
     gui_append(gui, "📱 Waiting for WhatsApp login (scan QR)...")
-    for _ in range(timeout_seconds):
-        # The editable chat/search box appears after login
-        try:
-            el = await page.query_selector("div[contenteditable='true'][data-tab]")
-            if el:
-                gui_append(gui, "✅ Logged into WhatsApp Web. Starting sends.")
-                return True
-        except Exception:
-            pass
-        await asyncio.sleep(1)
+    el, waited = await SELECTORS.wait(page, "logged_in", timeout_seconds)
+    if el:
+        gui_append(gui, f"✅ Logged into WhatsApp Web after {waited:.1f}s. Starting sends.")
+        return True
 
     gui_append(gui, "❌ QR not scanned within timeout. Aborting.")
     return False
 
 
-async def wait_for_chat_ready(page, gui, timeout_seconds: int = 30):
+async def wait_for_chat_ready(page, gui, timeout_seconds: int = 30, element="chat_input"):
     """
     Wait until chat input is ready for typing.
-    Returns the chat element or raises RuntimeError.
+    Returns (chat element, seconds waited) or raises SendFailure.
+
+    Known failure states (invalid-number dialog, QR code, offline banner)
+    end the wait as soon as they appear, instead of after the timeout.
     """
-    gui_append(gui, "⌛ Waiting for chat elements to become ready...")
-    for _ in range(timeout_seconds):
-        # main message input (works on most layouts)
-        chat = await page.query_selector("div[contenteditable='true'][data-tab]")
-        if chat:
-            return chat
-
-        # Fallback: any other message-area hints
-        # These are more future-proof but not strictly required
-        new_message_btn = await page.query_selector("div[title='Message']")
-        search_btn = await page.query_selector(
-            "button[aria-label='Search input textbox']"
-        )
+    chat, waited = await SELECTORS.wait(
+        page, element, timeout_seconds, also=tuple(FAILURE_ELEMENTS)
+    )
+    if chat is None:
+        kind = await detect_failure(page, SELECTORS)
+        if kind is None:
+            SELECTORS.record_miss(element)
+            raise SendFailure(SELECTOR_MISS, f"chat input not ready after {waited:.0f}s")
+        raise SendFailure(kind, f"after {waited:.1f}s")
+    gui_append(gui, f"   Chat ready in {waited:.2f}s")
+    return chat, waited
+
+
+# ------------- CHAT NAVIGATION -------------
+
+# Marks the open chat pane stale, so its composer is never taken for the
+# composer of the chat being opened ("fresh_chat_input")
+_MARK_STALE_JS = """
+() => {
+    const main = document.querySelector("#main");
+    if (main) main.setAttribute("data-wbs-stale", "1");
+}
+"""
+
+# First new-chat search result whose text carries the number's digits
+# (results are shown formatted, e.g. "+91 98765 43210"); null until the
+# search has caught up with the typed number.
+_MATCH_RESULT_JS = """
+([selector, phone]) => {
+    for (const item of document.querySelectorAll(selector)) {
+        if ((item.textContent || "").replace(/\\D/g, "").includes(phone)) return item;
+    }
+    return null;
+}
+"""
+
+
+async def open_chat_in_app(page, gui, phone: str, timeout_seconds: float = 10):
+    """
+    Open the chat for `phone` through the app's own new-chat search (no
+    page reload, no app re-boot): new-chat button -> type the number ->
+    click the result showing that number. Selectors: "new_chat",
+    "new_chat_search", "new_chat_result" in selectors.json.
+
+    Returns (chat element or None, seconds waited); on None (an element
+    missing, or no result for the number, e.g. a saved contact shown by
+    name) the caller falls back to a full page.goto. Classified failures
+    (e.g. logged out) raise SendFailure as in wait_for_chat_ready().
+    """
+    started = time.monotonic()
+
+    def remaining():
+        return max(timeout_seconds - (time.monotonic() - started), 0.5)
+
+    try:
+        await page.evaluate(_MARK_STALE_JS)
+        button, _ = await SELECTORS.wait(page, "new_chat", remaining())
+        if button is None:
+            return None, time.monotonic() - started
+        await button.click()
+        search, _ = await SELECTORS.wait(page, "new_chat_search", remaining())
+        if search is None:
+            await page.keyboard.press("Escape")
+            return None, time.monotonic() - started
+        await search.click()
+        await page.keyboard.press("Control+A")
+        await page.keyboard.press("Backspace")
+        await page.keyboard.insert_text(phone)
+        try:
+            handle = await page.wait_for_function(
+                _MATCH_RESULT_JS,
+                arg=[SELECTORS.combined("new_chat_result"), phone],
+                timeout=remaining() * 1000,
+            )
+        except PlaywrightTimeoutError:
+            await page.keyboard.press("Escape")
+            return None, time.monotonic() - started
+        await handle.as_element().click()
+        chat, _ = await wait_for_chat_ready(page, gui, remaining(), "fresh_chat_input")
+    except SendFailure as e:
+        if e.kind != SELECTOR_MISS:
+            raise
+        return None, time.monotonic() - started
+    except Exception:
+        return None, time.monotonic() - started
+    return chat, time.monotonic() - started
+
+
+async def dismiss_dialog(page, element: str = "invalid_number"):
+    """
+    Close a modal (e.g. the invalid-number popup) so the app stays usable
+    and the next contact does not see it: Escape, then its OK button.
+    """
+    try:
+        await page.keyboard.press("Escape")
+        dialog = await SELECTORS.query(page, element, record_miss=False)
+        if dialog is not None:
+            button = await dialog.query_selector("button, div[role='button']")
+            if button is not None:
+                await button.click()
+    except Exception:
+        pass
+
+
+# ------------- BROWSER SESSION -------------
 
-        if new_message_btn or search_btn:
-            # UI loaded but maybe waiting a bit more
-            await asyncio.sleep(1)
-            continue
 
-        await asyncio.sleep(1)
+async def launch_browser(p, gui, profile_dir=None, headless: bool = False):
+    """
+    Open Chromium and return (context, page).
+
+    With profile_dir, a persistent context is used: cookies, IndexedDB
+    (the WhatsApp session) and HTTP/service-worker caches survive restarts,
+    so no QR scan and no cold load. Falls back to a throwaway context if
+    the profile cannot be opened (e.g. in use by another window).
+    """
+    if profile_dir:
+        try:
+            Path(profile_dir).mkdir(parents=True, exist_ok=True)
+            context = await p.chromium.launch_persistent_context(
+                str(profile_dir), headless=headless
+            )
+            page = context.pages[0] if context.pages else await context.new_page()
+            gui_append(gui, f"🗂 Using saved browser profile: {profile_dir}")
+            return context, page
+        except Exception as e:
+            gui_append(
+                gui,
+                f"⚠ Could not open browser profile {profile_dir}: {e}. "
+                "Using a fresh session instead.",
+            )
+
+    browser = await p.chromium.launch(headless=headless)
+    context = await browser.new_context()
+    page = await context.new_page()
+    return context, page
+
+
+async def close_browser(context):
+    """
+    Close a context from launch_browser(); also closes the browser it
+    belongs to (persistent contexts have none).
+    """
+    browser = context.browser
+    try:
+        await context.close()
+    finally:
+        if browser is not None:
+            await browser.close()
+
+
+async def check_session(page, timeout_seconds: float = 20):
+    """
+    Quick health check after loading WhatsApp Web.
+    Returns "logged_in", "needs_qr" or "unknown" (neither appeared in time).
+    """
+    el, _ = await wait_for_selector(
+        page,
+        f"{SELECTORS.combined('logged_in')}, {SELECTORS.combined('qr')}",
+        timeout_seconds,
+    )
+    if el is None:
+        return "unknown"
+    if await SELECTORS.query(page, "logged_in"):
+        return "logged_in"
+    return "needs_qr"
+
+
+async def wait_for_network(page, gui, base_url: str, timeout_seconds: float = 600):
+    """
+    After a network failure: reload WhatsApp Web, backing off between
+    tries, until it loads again (logged in or showing the QR). Returns
+    False if it did not within timeout_seconds, or STOP was pressed.
+    """
+    started = time.monotonic()
+    attempt = 0
+    while not should_stop(gui):
+        attempt += 1
+        try:
+            if await page.evaluate("navigator.onLine"):
+                await page.goto(base_url, wait_until="domcontentloaded")
+                if await check_session(page) != "unknown":
+                    gui_append(gui, "📶 Connection is back.")
+                    return True
+        except Exception:
+            pass
+        delay = backoff_seconds(NETWORK, attempt)
+        if time.monotonic() - started + delay > timeout_seconds:
+            return False
+        gui_append(gui, f"📶 Offline; checking again in {delay:.0f} seconds...")
+        await asyncio.sleep(delay)
+    return False
+
+
+# ------------- MESSAGE ENTRY -------------
+
+# Fires a synthetic paste on the focused editor; WhatsApp's editor keeps
+# line breaks and emoji from pasted text/plain.
+_PASTE_JS = """
+text => {
+    const target = document.activeElement;
+    if (!target) return false;
+    const data = new DataTransfer();
+    data.setData("text/plain", text);
+    target.dispatchEvent(new ClipboardEvent("paste", {
+        clipboardData: data, bubbles: true, cancelable: true,
+    }));
+    return true;
+}
+"""
+
+
+async def enter_message(page, msg: str, mode: str = "insert", type_delay_ms: int = 40):
+    """
+    Put `msg` into the focused composer without sending it.
+    Returns seconds spent.
+
+    - insert: one insert_text per line (no per-key events)
+    - paste:  a single synthetic paste of the whole text
+    - type:   legacy per-character typing with `type_delay_ms`
 
-    raise RuntimeError("Chat input not found or not ready.")
+    In insert/type modes line breaks are entered as Shift+Enter, since a
+    plain Enter would send the message early.
+    """
+    msg = msg.replace("\r\n", "\n").replace("\r", "\n")
+    started = time.monotonic()
+    if mode == "paste":
+        pasted = await page.evaluate(_PASTE_JS, msg)
+        if not pasted:
+            raise RuntimeError("No focused element to paste the message into.")
+    else:
+        for n, line in enumerate(msg.split("\n")):
+            if n:
+                await page.keyboard.press("Shift+Enter")
+            if not line:
+                continue
+            if mode == "type":
+                await page.keyboard.type(line, delay=type_delay_ms)
+            else:
+                await page.keyboard.insert_text(line)
+    return time.monotonic() - started
+
+
+# ------------- ATTACHMENTS -------------
+
+
+async def attach_files(page, gui, attachments, metrics=None, contact=None) -> bool:
+    """
+    Open the attach menu and hand prepared in-memory payloads to the
+    matching file input. Returns True once the preview is shown.
+    Records "attach_click" and "upload" stage timings when given metrics.
+    """
+    started = time.monotonic()
+    try:
+        clip = await SELECTORS.query(page, "attach")
+        if not clip:
+            gui_append(gui, "   ⚠ Attach icon not found; sending text only.")
+            return False
+        await clip.click()
+    except Exception:
+        gui_append(gui, "   ⚠ Error clicking attach icon; sending text only.")
+        return False
+
+    # Photos/videos and documents have separate hidden inputs; the
+    # document candidates end with any file input, for other layouts.
+    input_element = "media_input" if attachments[0].kind == "media" else "document_input"
+    file_input, _ = await SELECTORS.wait(page, input_element, 3, state="attached")
+    if file_input is None and input_element == "media_input":
+        file_input, _ = await SELECTORS.wait(page, "document_input", 1, state="attached")
+    if file_input is None:
+        gui_append(gui, "   ⚠ File input not found; sending text only.")
+        return False
+
+    upload_started = time.monotonic()
+    if metrics is not None:
+        metrics.observe("attach_click", upload_started - started, contact)
+
+    await file_input.set_input_files([a.payload() for a in attachments])
+
+    # Preview is ready once its send button shows
+    preview, waited = await SELECTORS.wait(page, "send_button", 15)
+    if metrics is not None:
+        metrics.observe("upload", time.monotonic() - upload_started, contact)
+    if preview is None:
+        gui_append(gui, "   ⚠ Attachment preview did not appear in 15s.")
+        return False
+    gui_append(gui, f"   Attachment preview ready in {waited:.2f}s")
+    return True
 
 
 # ------------- MAIN SENDING COROUTINE -------------
@@ -156,32 +474,195 @@ async def send_batch(
     auto_pause_max: float = 180.0,
     resume: bool = True,
     max_retries_per_contact: int = 3,
+    network_wait: float = 600.0,
+    state_fsync_interval: float = 2.0,
+    ledger_path=LEDGER_FILE,
+    skip_delivered: bool = True,
+    default_country_code: str = "",
+    profile_dir=None,
+    max_image_side: int = 0,
+    entry_mode: str = "insert",
+    pause_event=None,
+    trace_path=TRACE_FILE,
+    metrics_path=PROMETHEUS_FILE,
+    base_url: str = WHATSAPP_URL,
+    headless: bool = False,
+    recycle_every: int = 200,
+    heap_limit_mb: float = 400.0,
+    block_resources: bool = False,
+    navigation: str = "in_app",
+    skip_bad_numbers: bool = True,
+    bad_number_ttl_days: float = 90,
+    track_delivery: bool = True,
+    delivery_timeout: float = 120.0,
+    suppression=SUPPRESSION_DIR,
+    suppression_sources=(),
+    results_path=RESULTS_DIR,
+    contacts_cache=CONTACTS_CACHE_DIR,
+    state_path=STATE_FILE,
+    stop_at=None,
 ):
     """
     Main sending routine.
 
-    - gui: PySide6 main window (for logs / progress)
-    - excel_path: contacts file (columns: name, phone, optional message)
-    - template_path: message template file (contains {{name}})
-    - image_path: image file path
+    - gui: reporter.Reporter for logs / progress / status / metrics
+           (qt_reporter.QtReporter for the dashboard, reporter.JsonLinesReporter
+           for cli.py); called from the sender thread
+    - excel_path: contacts file (.xlsx, .csv or .parquet;
+                  columns: name, phone, optional message)
+    - template_path: message template file; {{column}} placeholders are
+                     filled from any contacts column, e.g. {{name|default:there}}
+    - image_path: attachment path, or a list of paths (images, videos, PDFs...);
+                  prepared once per campaign and sent from memory
+    - network_wait: seconds to wait for a lost connection to come back;
+                    after that the run stops at the current contact
+                    (a network failure never counts as the contact's outcome)
+    - state_fsync_interval: max seconds between fsyncs of the progress journal
+    - ledger_path: phone-keyed delivery ledger (SQLite), shared across runs/files
+    - skip_delivered: skip numbers the ledger already records as sent
+    - default_country_code: prefixed to numbers written without one (e.g. "91")
+    - profile_dir: persistent browser profile folder; keeps the WhatsApp
+                   login and caches between runs (None = fresh session)
+    - max_image_side: JPEG/PNG attachments are downscaled to this many
+                      pixels on the longest side (0 = send originals,
+                      the default; WhatsApp compresses images itself)
+    - entry_mode: "insert" (default), "paste" or "type" (per-key, slow);
+                  see enter_message()
+    - pause_event: asyncio.Event; while cleared the loop waits before the
+                   next contact, keeping the browser logged in
+    - trace_path: JSON-lines file with one timing sample per stage per contact
+    - metrics_path: Prometheus text-format file with counters and histograms
+    - base_url: WhatsApp Web origin; point it at bench/fake_whatsapp.py to
+                run offline
+    - headless: run Chromium without a window (benchmarks / CI)
+    - recycle_every: open a fresh tab every this many contacts (0 = never);
+                     the login is kept, the renderer's memory is not
+    - heap_limit_mb: also recycle the tab when its JS heap grows past this
+                     (sampled through CDP every few contacts; 0 = off)
+    - block_resources: abort font, media and avatar requests the send
+                       flow does not need
+    - navigation: "in_app" (default) opens each chat through the loaded
+                  app's new-chat search and reloads only when that fails;
+                  "reload" always does a full page.goto per contact
+    - skip_bad_numbers: skip numbers WhatsApp rejected as invalid before
+                        (kept in the ledger's bad_numbers table)
+    - bad_number_ttl_days: retry a rejected number after this many days
+                           (0 = never)
+    - track_delivery: follow each sent message's ticks in the background
+                      (delivery.DeliveryTracker) and record confirmed /
+                      pending / unconfirmed / failed in the ledger, journal
+                      and metrics; only an error tick marks a message failed
+    - delivery_timeout: seconds a message may stay unconfirmed before it
+                        is settled as pending (clock icon) or unconfirmed
+                        (no tick seen)
+    - suppression: opt-out index folder, or a suppression.SuppressionIndex
+                   shared with the GUI so numbers added during the run are
+                   honoured before the next send (None = no suppression)
+    - suppression_sources: CSV/XLSX opt-out lists imported into the index
+                           before the run; imported lists are kept (and
+                           re-read when their file changes) until removed
+                           with SuppressionIndex.remove_source()
+    - results_path: per-contact results (results.ResultsWriter): a .csv /
+                    .parquet file, or a folder that gets one CSV per run
+                    (None = off); summarize with `python results.py FILE...`
+    - contacts_cache: folder for the parsed, validated contacts table
+                      (Arrow IPC, see contacts_cache.py); a resume of an
+                      unchanged file skips parsing it (None = parse every time)
+    - state_path: progress journal snapshot (resume position, sent today);
+                  one per campaign when several share the machine
+    - stop_at: datetime after which no new contact is started (end of the
+               sending window); progress is saved as for the daily limit
+
+    Failures are classified (see failures.py): invalid numbers fail at
+    once, network errors back off exponentially, a logged-out session waits
+    for a QR re-scan (the campaign stops if none comes) and missing page
+    elements are retried quickly.
+
+    Returns True when the loop ended normally (list done, daily limit or
+    STOP), False when the browser could not start, login timed out, or the
+    run stopped at a contact because the login or the connection was lost.
+
+    Cancelling the task stops every wait and sleep at once; the journal,
+    ledger and browser are closed in finally blocks.
     """
 
-    # --------- LOAD CONTACTS ---------
-    df = pd.read_excel(excel_path, engine="openpyxl", dtype=str)
-    df.columns = [c.lower() for c in df.columns]
-
-    if "name" not in df.columns or "phone" not in df.columns:
-        raise ValueError("Excel must include columns: name, phone")
+    base_url = base_url.rstrip("/")
+    if entry_mode not in ENTRY_MODES:
+        raise ValueError(f"entry_mode must be one of: {', '.join(ENTRY_MODES)}")
+    if navigation not in NAVIGATION_MODES:
+        raise ValueError(f"navigation must be one of: {', '.join(NAVIGATION_MODES)}")
 
-    records = df.to_dict(orient="records")
+    # --------- LOAD CONTACTS ---------
+    # Parsed and validated once per version of the file; later starts read
+    # the cached Arrow copy. Rows are streamed later from contacts.path.
+    load_started = time.monotonic()
+    contacts = load_contacts(excel_path, default_country_code, contacts_cache)
+    columns = contacts.columns
+    total = contacts.total
+    gui_append(
+        gui,
+        f"📒 {total} contacts {'loaded from cache' if contacts.cached else 'read'} "
+        f"in {time.monotonic() - load_started:.2f}s",
+    )
 
     # --------- LOAD TEMPLATE ---------
-    template = ""
+    template_text = ""
     if template_path and Path(template_path).exists():
-        template = Path(template_path).read_text(encoding="utf-8")
+        template_text = Path(template_path).read_text(encoding="utf-8")
+
+    # Parsed once; unknown filters raise TemplateError here, and columns the
+    # template needs but the contacts file lacks are reported before launch.
+    template = compile_template(template_text)
+    missing = template.missing_columns(columns)
+    if missing:
+        raise ValueError(
+            "Template uses columns missing from the contacts file: "
+            + ", ".join(missing)
+            + " (add the columns or give a default, e.g. {{city|default:your city}})"
+        )
+
+    # --------- PRE-FLIGHT PHONE VALIDATION ---------
+    # Whole column normalized to E.164 up front (by load_contacts); invalid
+    # and duplicate rows are reported here and reach the send loop only as
+    # skips, for the results file.
+    checked = contacts.checked
+    gui_append(gui, f"🔎 {checked.summary()}")
+    phones = checked.phones
+
+    # --------- SUPPRESSION (OPT-OUTS) ---------
+    # Whole column checked against the do-not-contact index at once;
+    # suppressed rows are skipped like invalid ones.
+    optouts = None
+    if suppression is not None:
+        optouts = (
+            suppression
+            if isinstance(suppression, SuppressionIndex)
+            else SuppressionIndex(suppression)
+        )
+        if suppression_sources:
+            synced = optouts.sync(suppression_sources, default_country_code)
+            if synced["rebuilt"] or synced["added"]:
+                gui_append(gui, f"🚫 Opt-out lists updated: {synced['added']:+d} numbers.")
+        suppressed = optouts.mask(phones)
+        dropped = sum(suppressed)
+        if dropped:
+            phones = [None if s else ph for ph, s in zip(phones, suppressed)]
+        gui_append(gui, f"🚫 {optouts.describe()}; {dropped} contacts suppressed.")
+
+    # --------- ATTACHMENTS ---------
+    # Hashed, downscaled and read into memory once; reused for every contact
+    attachments = prepare_attachments(image_path, max_image_side=max_image_side)
+    media = [a for a in attachments if a.kind == "media"]
+    documents = [a for a in attachments if a.kind == "document"]
+    for a in attachments:
+        gui_append(
+            gui,
+            f"📎 Prepared {a.name} ({a.mime_type}, {len(a.buffer) / 1024:.0f} KB)",
+        )
 
     # --------- STATE ---------
-    state = load_state()
+    journal = ProgressJournal(state_path, fsync_interval=state_fsync_interval)
+    state = journal.load()
     sent_today = state.get("sent_today", 0)
     last_date = state.get("last_sent_date", "")
     if last_date != str(date.today()):
@@ -189,250 +670,540 @@ async def send_batch(
 
     start_index = state.get("last_index", 0) if resume else 0
 
+    ledger = DeliveryLedger(ledger_path)
+    source = Path(excel_path).name
+
+    metrics = SendMetrics(total, trace_path=trace_path, prometheus_path=metrics_path)
+    SELECTORS.metrics = metrics
+    sendable_total = sum(1 for ph in phones[start_index:] if ph)
+    processed = 0
+
+    results = None
+    if results_path is not None:
+        results = ResultsWriter(results_file(results_path, excel_path))
+        gui_append(gui, f"📄 Writing results to {results.path}")
+
+    def record_result(i, phone, name, status, attempts=0, started_at=None,
+                      seconds=None, error_class=None, error=None):
+        if results is not None:
+            results.write(i + 1, phone, name, status, attempts, started_at,
+                          seconds, error_class, error)
+
+    def report_metrics():
+        remaining = min(sendable_total - processed, max(daily_limit - sent_today, 0))
+        gui_metrics(gui, metrics.snapshot(remaining))
+
     # --------- CONFIG PLAYWRIGHT PATH ---------
     configure_playwright_browsers_path(gui)
 
     # --------- START PLAYWRIGHT ---------
-    async with async_playwright() as p:
-        try:
-            browser = await p.chromium.launch(headless=False)
-        except Exception as e:
-            gui_append(gui, f"❌ Failed to launch Chromium: {e}")
-            gui_append(
-                "Hint: If this is on a new machine, make sure the ms-playwright "
-                "folder exists next to app.exe or Playwright browsers are installed."
-            )
-            return
+    try:
+        async with async_playwright() as p:
+            try:
+                context, page = await launch_browser(p, gui, profile_dir, headless)
+            except Exception as e:
+                gui_append(gui, f"❌ Failed to launch Chromium: {e}")
+                gui_append(
+                    gui,
+                    "Hint: If this is on a new machine, make sure the ms-playwright "
+                    "folder exists next to app.exe or Playwright browsers are installed."
+                )
+                return False
+
+            producer = None
+            tracker = None
+            try:
+                resources = ResourceManager(
+                    context,
+                    gui,
+                    recycle_every=recycle_every,
+                    heap_limit_mb=heap_limit_mb,
+                    block_resources=block_resources,
+                    metrics=metrics,
+                )
+                await resources.install()
+
+                if track_delivery:
+                    tracker = DeliveryTracker(
+                        context,
+                        lambda: page,
+                        ledger,
+                        journal=journal,
+                        metrics=metrics,
+                        gui=gui,
+                        timeout=delivery_timeout,
+                    )
+                    await tracker.install()
 
-        context = await browser.new_context()
-        page = await context.new_page()
+                gui_append(gui, "🌐 Opened browser. Loading WhatsApp Web...")
+                load_started = time.monotonic()
+                await page.goto(base_url, wait_until="domcontentloaded")
 
-        gui_append(gui, "🌐 Opened browser. Loading WhatsApp Web...")
-        await page.goto("https://web.whatsapp.com")
+                if profile_dir:
+                    session = await check_session(page)
+                    if session == "logged_in":
+                        gui_append(
+                            gui,
+                            "✅ Saved session is valid; ready in "
+                            f"{time.monotonic() - load_started:.1f}s.",
+                        )
+                    elif session == "needs_qr":
+                        gui_append(gui, "🔑 Saved session expired; scan the QR code once to renew it.")
+                    else:
+                        gui_append(gui, "⚠ WhatsApp Web is slow to load; still waiting for login.")
 
-        # Wait for login
-        logged_in = await wait_for_login(page, gui)
-        if not logged_in:
-            await browser.close()
-            return
-
-        total = len(records)
-        gui.progress.setMaximum(total)
-
-        counter_since_pause = 0
-
-        # --------- MAIN LOOP ---------
-        for i in range(start_index, total):
-            if should_stop(gui):
-                gui_append(gui, "⏹ STOP requested. Gracefully ending after current contact.")
-                break
-
-            rec = records[i]
-            name = (rec.get("name") or "").strip()
-            phone = (rec.get("phone") or "").strip().replace("+", "").replace(" ", "")
-            custom = (rec.get("message") or "").strip() if "message" in rec else ""
-
-            if not phone or not phone.isdigit():
-                gui_append(gui, f"⚠ Skipping invalid phone at row {i + 1}: {phone}")
-                state_update = {
-                    "last_index": i + 1,
-                    "last_sent_date": str(date.today()),
-                    "sent_today": sent_today,
-                }
-                save_state(state_update)
-                continue
+                # Wait for login
+                logged_in = await wait_for_login(page, gui)
+                if not logged_in:
+                    return False
 
-            if sent_today >= daily_limit:
-                gui_append(
-                    f"⏸ Daily limit {daily_limit} reached. "
-                    f"Saved progress at index {i}."
-                )
-                state_update = {
-                    "last_index": i,
-                    "last_sent_date": str(date.today()),
-                    "sent_today": sent_today,
-                }
-                save_state(state_update)
-                break
-
-            # Build personalized message
-            msg_template = custom if custom else template
-            msg = msg_template.replace("{{name}}", name)
+                gui_progress(gui, maximum=total)
 
-            gui_append(
-                gui,
-                f"➡ Sending to {name} ({phone}) [{i + 1}/{total}]",
-            )
+                async def reopen(new_page):
+                    await new_page.goto(base_url, wait_until="domcontentloaded")
+                    el, _ = await SELECTORS.wait(new_page, "logged_in", 60)
+                    if el is None:
+                        raise RuntimeError("WhatsApp Web did not load in the new tab")
 
-            chat_url = (
-                f"https://web.whatsapp.com/send?phone={phone}&t={int(time.time())}"
-            )
+                counter_since_pause = 0
+                in_app_failures = 0
+                aborted = False
+
+                # --------- MAIN LOOP ---------
+                # Rows are read, checked against the ledger and rendered by a
+                # producer task while this loop waits on the browser or sleeps
+                # through its pacing delays.
+                producer = ContactProducer(
+                    contacts.path,
+                    start_index,
+                    phones,
+                    template,
+                    columns,
+                    ledger,
+                    skip_delivered=skip_delivered,
+                    skip_bad_numbers=skip_bad_numbers,
+                    bad_number_ttl_days=bad_number_ttl_days,
+                    metrics=metrics,
+                    on_warning=lambda text: gui_append(gui, text),
+                    normalized=checked.phones,
+                    default_country_code=default_country_code,
+                ).start()
+
+                async for item in producer:
+                    i, phone, name, msg = item.index, item.phone, item.name, item.msg
+                    if should_stop(gui):
+                        gui_append(gui, "⏹ STOP requested. Gracefully ending after current contact.")
+                        break
+
+                    if pause_event is not None and not pause_event.is_set():
+                        gui_append(gui, "⏸ Paused. WhatsApp session stays open; press RESUME to continue.")
+                        gui_status(gui, "Paused")
+                        await pause_event.wait()
+                        gui_append(gui, "▶ Resumed.")
+
+                    if item.skip:
+                        # Dropped by pre-flight / suppression, already sent
+                        # or known bad: decided by the producer
+                        outcome, line = item.skip
+                        if line:
+                            gui_append(gui, line)
+                        journal.record(
+                            outcome,
+                            last_index=i + 1,
+                            last_sent_date=str(date.today()),
+                            sent_today=sent_today,
+                        )
+                        record_result(i, phone, name, outcome)
+                        if phones[i]:
+                            # Pre-flight drops are not part of sendable_total
+                            metrics.incr("skipped")
+                            processed += 1
+                        continue
+
+                    if optouts is not None and optouts.contains(phone):
+                        # Opted out after the run started
+                        gui_append(gui, f"🚫 {phone} opted out (row {i + 1}); skipping.")
+                        journal.record(
+                            "suppressed",
+                            last_index=i + 1,
+                            last_sent_date=str(date.today()),
+                            sent_today=sent_today,
+                        )
+                        record_result(i, phone, name, "suppressed")
+                        metrics.incr("skipped")
+                        processed += 1
+                        continue
+
+                    if sent_today >= daily_limit:
+                        gui_append(
+                            gui,
+                            f"⏸ Daily limit {daily_limit} reached. "
+                            f"Saved progress at index {i}."
+                        )
+                        state_update = {
+                            "last_index": i,
+                            "last_sent_date": str(date.today()),
+                            "sent_today": sent_today,
+                        }
+                        journal.record("limit", **state_update)
+                        break
+
+                    if stop_at is not None and datetime.now() >= stop_at:
+                        gui_append(
+                            gui,
+                            f"⏸ Sending window ended at {stop_at:%H:%M}. "
+                            f"Saved progress at index {i}.",
+                        )
+                        journal.record(
+                            "window",
+                            last_index=i,
+                            last_sent_date=str(date.today()),
+                            sent_today=sent_today,
+                        )
+                        break
 
-            success = False
+                    # Collect ticks before this page may be left
+                    if tracker is not None:
+                        await tracker.poll()
+
+                    # Fresh tab every N contacts / on heap growth
+                    page = await resources.maybe_recycle(page, reopen, contact=i)
 
-            # --------- SMART RETRIES PER CONTACT ---------
-            for attempt in range(1, max_retries_per_contact + 1):
-                if should_stop(gui):
                     gui_append(
                         gui,
-                        "⏹ STOP requested while retrying. Ending after current contact.",
+                        f"➡ Sending to {name} ({phone}) [{i + 1}/{total}]",
                     )
-                    break
+                    contact_started = time.monotonic()
+                    contact_wall = time.time()
 
-                try:
-                    gui_append(
-                        gui,
-                        f"   Attempt {attempt}/{max_retries_per_contact} for {phone}",
+                    chat_url = (
+                        f"{base_url}/send?phone={phone}&t={int(time.time())}"
                     )
 
-                    await page.goto(chat_url)
-                    await page.wait_for_timeout(random.uniform(3000, 6000))
+                    success = False
+                    message_out = False
+                    failure_kind = None
+                    last_error = None
+                    attempts = 0
+                    abort_campaign = None
 
-                    # Wait for chat box
+                    # --------- SMART RETRIES PER CONTACT ---------
                     try:
-                        chat_elem = await wait_for_chat_ready(page, gui, 30)
-                    except RuntimeError as e:
-                        gui_append(gui, f"⚠ {e}")
-                        if attempt < max_retries_per_contact:
-                            gui_append(gui, "   Retrying after short delay...")
-                            await asyncio.sleep(5)
-                            continue
-                        else:
-                            gui_append(
-                                gui,
-                                "❌ Giving up on this contact due to chat input issue.",
+                        for attempt in range(1, max_retries_per_contact + 1):
+                            if should_stop(gui):
+                                gui_append(
+                                    gui,
+                                    "⏹ STOP requested while retrying. Ending after current contact.",
+                                )
+                                break
+
+                            attempts = attempt
+                            try:
+                                gui_append(
+                                    gui,
+                                    f"   Attempt {attempt}/{max_retries_per_contact} for {phone}",
+                                )
+
+                                # First attempt: open the chat inside the running app
+                                chat_elem = None
+                                if (
+                                    navigation == "in_app"
+                                    and attempt == 1
+                                    and in_app_failures < IN_APP_MAX_FAILURES
+                                ):
+                                    chat_elem, waited = await open_chat_in_app(page, gui, phone)
+                                    metrics.observe("open_chat", waited, i)
+                                    if chat_elem is not None:
+                                        in_app_failures = 0
+                                        gui_append(gui, f"   Chat opened in-app in {waited:.2f}s")
+                                    else:
+                                        in_app_failures += 1
+                                        gui_append(gui, "   In-app chat did not open; reloading.")
+                                        if in_app_failures >= IN_APP_MAX_FAILURES:
+                                            gui_append(
+                                                gui,
+                                                f"⚠ In-app navigation failed {in_app_failures} "
+                                                "times in a row; using full reloads from now on.",
+                                            )
+
+                                if chat_elem is None:
+                                    # Only wait for the HTML; readiness is decided by
+                                    # the composer appearing, not by a fixed sleep.
+                                    with metrics.stage("goto", i):
+                                        await page.goto(chat_url, wait_until="domcontentloaded")
+
+                                    # Wait for chat box (or a recognised failure)
+                                    with metrics.stage("chat_ready", i):
+                                        chat_elem, waited = await wait_for_chat_ready(page, gui, 30)
+
+                                # Attachments: media (photos/videos) carry the message
+                                # as caption; documents go with it when there is no media
+                                primary = media or documents
+                                attached = False
+                                if primary:
+                                    attached = await attach_files(
+                                        page, gui, primary, metrics, i
+                                    )
+
+                                if attached:
+                                    # Caption box of the media preview
+                                    try:
+                                        caption = await SELECTORS.query(page, "caption")
+                                        if caption:
+                                            await caption.click()
+                                    except Exception:
+                                        pass
+                                else:
+                                    # Fallback: ensure chat input is focused
+                                    try:
+                                        await chat_elem.click()
+                                    except Exception:
+                                        pass
+
+                                # Enter message & send
+                                enter_wall = time.time()
+                                try:
+                                    entry_seconds = await enter_message(page, msg, entry_mode)
+                                    metrics.observe("entry", entry_seconds, i)
+                                    gui_append(
+                                        gui,
+                                        f"   Message entered in {entry_seconds:.2f}s ({entry_mode})",
+                                    )
+                                    with metrics.stage("send", i):
+                                        await page.keyboard.press("Enter")
+                                except Exception as e:
+                                    gui_append(
+                                        gui,
+                                        f"   ⚠ Failed to press Enter: {e}. Trying send button.",
+                                    )
+                                    send_btn = await SELECTORS.query(page, "send_button")
+                                    if send_btn:
+                                        await send_btn.click()
+                                    else:
+                                        raise
+                                message_out = True
+                                if tracker is not None:
+                                    # Confirmed in the background; no wait here
+                                    tracker.expect(phone, i, enter_wall)
+
+                                # Documents sent after a media message, without caption
+                                if media and documents:
+                                    if await attach_files(page, gui, documents, metrics, i):
+                                        await page.keyboard.press("Enter")
+
+                                success = True
+                                break  # break retry loop
+
+                            except Exception as e:
+                                if message_out:
+                                    # The message itself went out; a retry would
+                                    # send it twice.
+                                    gui_append(gui, f"   ⚠ Error after the message was sent: {e}")
+                                    success = True
+                                    break
+
+                                failure_kind = classify_exception(e)
+                                last_error = e
+                                policy = POLICIES[failure_kind]
+                                metrics.incr(f"failure_{failure_kind}")
+                                gui_append(
+                                    gui,
+                                    f"   ❌ Attempt {attempt} for {phone} failed "
+                                    f"[{failure_kind}]: {e}",
+                                )
+
+                                if policy.action == "fail":
+                                    if failure_kind == INVALID_NUMBER:
+                                        await dismiss_dialog(page)
+                                    gui_append(gui, "   Not retrying this contact.")
+                                    break
+
+                                if policy.action == "relogin":
+                                    gui_status(gui, "Logged out - scan the QR code")
+                                    if not await wait_for_login(page, gui):
+                                        abort_campaign = (
+                                            "WhatsApp Web logged out and was not restored"
+                                        )
+                                        break
+                                    gui_status(gui, "Running")
+
+                                if policy.action == "reconnect":
+                                    gui_status(gui, "Offline - waiting for the connection")
+                                    if not await wait_for_network(page, gui, base_url, network_wait):
+                                        if not should_stop(gui):
+                                            abort_campaign = (
+                                                "The network connection did not come back"
+                                            )
+                                        break
+                                    gui_status(gui, "Running")
+                                    if attempt < max_retries_per_contact:
+                                        metrics.incr("retries")
+                                        continue
+                                    break
+
+                                if attempt < max_retries_per_contact:
+                                    delay = backoff_seconds(failure_kind, attempt)
+                                    gui_append(gui, f"   Retrying in {delay:.0f} seconds...")
+                                    metrics.incr("retries")
+                                    with metrics.stage("retry_wait", i):
+                                        await asyncio.sleep(delay)
+                                else:
+                                    gui_append(
+                                        gui,
+                                        f"   ❌ All attempts failed for {phone}. Moving on.",
+                                    )
+                    except asyncio.CancelledError:
+                        if message_out:
+                            # Cancelled after the message went out: record it so
+                            # a resume does not send it twice.
+                            sent_today += 1
+                            journal.record(
+                                "sent",
+                                last_index=i + 1,
+                                last_sent_date=str(date.today()),
+                                sent_today=sent_today,
                             )
-                            break
-
-                    # Attach image (if possible)
-                    try:
-                        clip_selector = (
-                            "span[data-icon='clip'], "
-                            "span[data-icon='attach-menu-plus'], "
-                            "div[aria-label='Attach']"
-                        )
-                        clip = await page.query_selector(clip_selector)
-                        if clip:
-                            await clip.click()
-                            await page.wait_for_timeout(1000)
-                        else:
-                            gui_append(
-                                gui,
-                                "   ⚠ Attach icon not found; sending text only.",
+                            ledger.record(phone, "sent", source)
+                            record_result(
+                                i, phone, name, "sent", attempts, contact_wall,
+                                time.monotonic() - contact_started,
                             )
-                    except Exception:
-                        gui_append(
-                            gui,
-                            "   ⚠ Error clicking attach icon; sending text only.",
+                        raise
+
+                    # --------- AFTER RETRIES ---------
+                    if not success and not abort_campaign and failure_kind == UNKNOWN:
+                        # Unclassified errors while offline are network failures
+                        if await detect_failure(page, SELECTORS) == NETWORK:
+                            failure_kind = NETWORK
+                    if not success and failure_kind == NETWORK and not abort_campaign:
+                        # Never the contact's outcome: stop here, resume retries it
+                        abort_campaign = (
+                            "STOP requested while offline"
+                            if should_stop(gui)
+                            else f"Network errors on every attempt for {phone}"
                         )
 
-                    # File input for image (if clip clicked)
-                    try:
-                        file_input = await page.query_selector("input[type='file']")
-                    except Exception:
-                        file_input = None
-
-                    if file_input and image_path:
-                        await file_input.set_input_files(str(image_path))
-                        await page.wait_for_timeout(random.uniform(2000, 4000))
-
-                        # Caption box (reuse chat elem)
-                        try:
-                            caption = await page.query_selector(
-                                "div[contenteditable='true'][data-tab]"
-                            )
-                            if caption:
-                                await caption.click()
-                        except Exception:
-                            pass
-                    else:
-                        # Fallback: ensure chat input is focused
-                        try:
-                            await chat_elem.click()
-                        except Exception:
-                            pass
-
-                    # Type message & send
-                    try:
-                        await page.keyboard.type(msg, delay=40)
-                        await page.keyboard.press("Enter")
-                    except Exception as e:
+                    if abort_campaign:
                         gui_append(
-                            gui,
-                            f"   ⚠ Failed to press Enter: {e}. Trying send button.",
+                            gui, f"❌ {abort_campaign}. Stopping; progress saved at index {i}."
                         )
-                        send_btn = await page.query_selector("span[data-icon='send']")
-                        if send_btn:
-                            await send_btn.click()
-                        else:
-                            raise
-
-                    success = True
-                    break  # break retry loop
+                        journal.record(
+                            "aborted",
+                            last_index=i,
+                            last_sent_date=str(date.today()),
+                            sent_today=sent_today,
+                        )
+                        aborted = not should_stop(gui)
+                        break
+
+                    if not success:
+                        # Do not count as sent; but still move to next contact
+                        state_update = {
+                            "last_index": i + 1,
+                            "last_sent_date": str(date.today()),
+                            "sent_today": sent_today,
+                        }
+                        journal.record("failed", **state_update)
+                        ledger.record(phone, "failed", source)
+                        if failure_kind == INVALID_NUMBER:
+                            ledger.mark_bad(phone, failure_kind)
+                        contact_seconds = time.monotonic() - contact_started
+                        record_result(
+                            i, phone, name, "failed", attempts, contact_wall,
+                            contact_seconds, failure_kind, last_error,
+                        )
+                        metrics.observe("contact", contact_seconds, i)
+                        metrics.incr("failed")
+                        processed += 1
+                        report_metrics()
+                        if should_stop(gui):
+                            gui_append(gui, "⏹ STOP requested. Ending loop after this contact.")
+                            break
+                        continue
+
+                    # Success
+                    sent_today += 1
+                    counter_since_pause += 1
+                    gui_progress(gui, value=i + 1)
+                    gui_status(gui, f"Last sent: {name} ({phone})")
+
+                    state_update = {
+                        "last_index": i + 1,
+                        "last_sent_date": str(date.today()),
+                        "sent_today": sent_today,
+                    }
+                    journal.record("sent", **state_update)
+                    ledger.record(phone, "sent", source)
+                    contact_seconds = time.monotonic() - contact_started
+                    record_result(
+                        i, phone, name, "sent", attempts, contact_wall, contact_seconds
+                    )
+                    metrics.observe("contact", contact_seconds, i)
+                    metrics.incr("sent")
+                    processed += 1
+                    report_metrics()
 
-                except Exception as e:
                     gui_append(
                         gui,
-                        f"   ❌ Error during attempt {attempt} for {phone}: {e}",
+                        f"✔ Sent to {name}. Sent today: {sent_today}",
                     )
-                    if attempt < max_retries_per_contact:
-                        gui_append(gui, "   Retrying in 5 seconds...")
-                        await asyncio.sleep(5)
-                    else:
-                        gui_append(
-                            gui,
-                            f"   ❌ All attempts failed for {phone}. Moving on.",
-                        )
 
-            # --------- AFTER RETRIES ---------
-            if should_stop(gui):
-                gui_append(gui, "⏹ STOP requested. Ending loop after this contact.")
-                break
-
-            if not success:
-                # Do not count as sent; but still move to next contact
-                state_update = {
-                    "last_index": i + 1,
-                    "last_sent_date": str(date.today()),
-                    "sent_today": sent_today,
-                }
-                save_state(state_update)
-                continue
-
-            # Success
-            sent_today += 1
-            counter_since_pause += 1
-            gui.progress.setValue(i + 1)
-            gui.status_lbl.setText(f"Last sent: {name} ({phone})")
-
-            state_update = {
-                "last_index": i + 1,
-                "last_sent_date": str(date.today()),
-                "sent_today": sent_today,
-            }
-            save_state(state_update)
-
-            gui_append(
-                gui,
-                f"✔ Sent to {name}. Sent today: {sent_today}",
-            )
+                    if should_stop(gui):
+                        gui_append(gui, "⏹ STOP requested. Ending loop after this contact.")
+                        break
 
-            # Random delay between messages
-            delay = random.uniform(min_delay, max_delay)
-            gui_append(gui, f"⏳ Waiting {int(delay)} seconds before next send...")
-            await asyncio.sleep(delay)
+                    # Random delay between messages
+                    delay = random.uniform(min_delay, max_delay)
+                    gui_append(gui, f"⏳ Waiting {int(delay)} seconds before next send...")
+                    with metrics.stage("delay", i):
+                        await asyncio.sleep(delay)
 
-            # Auto pause
-            if auto_pause_every > 0 and counter_since_pause >= auto_pause_every:
-                pause = random.uniform(auto_pause_min, auto_pause_max)
-                gui_append(
-                    gui,
-                    f"⏸ Auto-pause for {int(pause)} seconds to mimic human usage.",
-                )
-                await asyncio.sleep(pause)
-                counter_since_pause = 0
+                    # Auto pause
+                    if auto_pause_every > 0 and counter_since_pause >= auto_pause_every:
+                        pause = random.uniform(auto_pause_min, auto_pause_max)
+                        gui_append(
+                            gui,
+                            f"⏸ Auto-pause for {int(pause)} seconds to mimic human usage.",
+                        )
+                        with metrics.stage("auto_pause", i):
+                            await asyncio.sleep(pause)
+                        counter_since_pause = 0
+                else:
+                    # End of the list (trailing rows may have been skipped)
+                    journal.record(
+                        "done",
+                        last_index=total,
+                        last_sent_date=str(date.today()),
+                        sent_today=sent_today,
+                    )
 
-        # --------- FINISH ---------
-        gui_append(gui, "🎉 Sending loop finished. Closing browser.")
-        await browser.close()
-        gui.status_lbl.setText("Idle")
\ No newline at end of file
+                # --------- FINISH ---------
+                if tracker is not None:
+                    gui_append(gui, "🔎 Waiting briefly for the last delivery ticks...")
+                    await tracker.close()
+                    gui_append(gui, tracker.summary_line())
+                for line in metrics.summary_lines() + SELECTORS.summary_lines():
+                    gui_append(gui, line)
+                gui_append(gui, "🎉 Sending loop finished. Closing browser.")
+                return not aborted
+            finally:
+                if producer is not None:
+                    await producer.close()
+                if tracker is not None:
+                    await tracker.close(grace=0)
+                try:
+                    await close_browser(context)
+                except Exception:
+                    pass  # already closed by the user
+                gui_status(gui, "Idle")
+    except asyncio.CancelledError:
+        gui_append(gui, "⏹ Campaign cancelled. Progress saved and browser closed.")
+        raise
+    finally:
+        journal.close()
+        ledger.close()
+        metrics.close()
+        if results is not None:
+            results.close()
+        SELECTORS.metrics = None
+        SELECTORS.save()
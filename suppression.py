@@ -0,0 +1,342 @@
+import hashlib
+import math
+import os
+import threading
+from pathlib import Path
+
+from contacts import read_column, read_header
+from journal import read_json, write_json_atomic
+from phones import needs_country_code, normalize_phone, normalize_phones
+
+SUPPRESSION_DIR = "suppression"
+
+_NUMBERS = "numbers.npy"    # sorted uint64 E.164 numbers, all sources
+_BLOOM = "bloom.npy"        # Bloom filter bits (uint8)
+_MANUAL = "manual.txt"      # opt-outs entered by hand; never rewritten
+_SOURCES = "sources"        # one sorted uint64 array per imported list
+_MANIFEST = "manifest.json"
+
+# Bloom filter sized for this false-positive rate; a positive is confirmed
+# against the sorted array, so it only costs one binary search.
+BLOOM_FP_RATE = 0.001
+# Fold manual opt-outs into the sorted array past this many new entries
+COMPACT_EVERY = 10000
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix(x: int) -> int:
+    """
+    splitmix64 finalizer (same arithmetic as _mix_array, on Python ints).
+    """
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def _mix_array(x):
+    import numpy as np
+
+    with np.errstate(over="ignore"):
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def _bloom_params(n: int):
+    n = max(n, 1000)
+    m = int(-n * math.log(BLOOM_FP_RATE) / (math.log(2) ** 2))
+    m = (m + 7) // 8 * 8
+    k = max(1, round(m / n * math.log(2)))
+    return m, k
+
+
+def _to_uint64(phones):
+    """
+    Normalized digit strings -> sorted unique uint64 array.
+    """
+    import numpy as np
+
+    values = [int(p) for p in phones if p]
+    return np.unique(np.array(values, dtype=np.uint64))
+
+
+def _save_array(path: Path, arr):
+    import numpy as np
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, arr)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class SuppressionIndex:
+    """
+    Do-not-contact numbers, kept in a folder:
+
+    - manual.txt:  opt-outs entered by hand, append-only; no sync, rebuild
+      or list removal ever drops them
+    - sources/:    the numbers of each imported list (sorted uint64), so a
+      list is only re-read when its file changes and stays suppressed
+      when the file is gone or not passed again
+    - numbers.npy: sorted uint64 union of all of the above (8 bytes/number,
+      memory-mapped, binary-searched)
+    - bloom.npy:   Bloom filter in front of it, so the common "not
+      suppressed" answer needs no search at all
+    - manifest.json: imported lists with size/mtime, and how many manual
+      entries are already in numbers.npy
+
+    A list's numbers are only removed by remove_source(). mask() checks a
+    whole phone column at once (vectorized); contains() and add_opt_out()
+    are safe to call from the GUI thread while a campaign runs.
+    """
+
+    def __init__(self, folder=SUPPRESSION_DIR):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        (self.folder / _SOURCES).mkdir(exist_ok=True)
+        self._lock = threading.Lock()
+        self.manifest = {}
+        self.numbers = None
+        self.bloom = None
+        self.bloom_k = 1
+        # Manual opt-outs not yet folded into numbers.npy
+        self.delta = set()
+        self.manual_count = 0
+        self.load()
+
+    # ---- storage ----
+
+    def _read_manual(self) -> list:
+        path = self.folder / _MANUAL
+        if not path.exists():
+            return []
+        with open(path, encoding="utf-8") as f:
+            return [int(line) for line in f if line.strip().isdigit()]
+
+    def load(self):
+        import numpy as np
+
+        with self._lock:
+            self.manifest = read_json(self.folder / _MANIFEST) or {"sources": {}}
+            numbers_path = self.folder / _NUMBERS
+            if numbers_path.exists():
+                self.numbers = np.load(numbers_path, mmap_mode="r")
+                self.bloom = np.load(self.folder / _BLOOM)
+                self.bloom_k = int(self.manifest.get("bloom_k", 1))
+            else:
+                self.numbers = np.zeros(0, dtype=np.uint64)
+                m, self.bloom_k = _bloom_params(0)
+                self.bloom = np.zeros(m // 8, dtype=np.uint8)
+            manual = self._read_manual()
+            self.manual_count = len(manual)
+            self.delta = set(manual[self.manifest.get("manual_folded", 0):])
+
+    def _source_file(self, source: str) -> Path:
+        key = hashlib.blake2b(source.encode("utf-8"), digest_size=8).hexdigest()
+        return self.folder / _SOURCES / f"{key}.npy"
+
+    def _rebuild(self):
+        """
+        numbers.npy = every stored list + every manual opt-out; rewrites the
+        Bloom filter and empties the delta. Caller holds the lock.
+        """
+        import numpy as np
+
+        parts = [np.load(self._source_file(s)) for s in self.manifest.get("sources", {})]
+        manual = self._read_manual()
+        parts.append(np.array(manual, dtype=np.uint64))
+        numbers = np.unique(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.uint64)
+
+        m, k = _bloom_params(len(numbers))
+        bits = np.zeros(m, dtype=bool)
+        h1 = _mix_array(numbers)
+        h2 = _mix_array(h1) | np.uint64(1)
+        with np.errstate(over="ignore"):
+            for i in range(k):
+                bits[(h1 + np.uint64(i) * h2) % np.uint64(m)] = True
+        bloom = np.packbits(bits, bitorder="little")
+
+        # Release the memory map first: Windows cannot replace a mapped file
+        self.numbers = None
+        for name, arr in ((_NUMBERS, numbers), (_BLOOM, bloom)):
+            _save_array(self.folder / name, arr)
+
+        self.manifest["count"] = int(len(numbers))
+        self.manifest["bloom_k"] = k
+        self.manifest["manual_folded"] = len(manual)
+        write_json_atomic(self.folder / _MANIFEST, self.manifest)
+
+        self.numbers = np.load(self.folder / _NUMBERS, mmap_mode="r")
+        self.bloom = bloom
+        self.bloom_k = k
+        self.manual_count = len(manual)
+        self.delta = set()
+
+    def compact(self):
+        with self._lock:
+            if self.delta:
+                self._rebuild()
+
+    # ---- sources ----
+
+    @staticmethod
+    def _read_source(path, default_country_code):
+        header = read_header(path)
+        column = "phone" if "phone" in header else header[0]
+        return normalize_phones(read_column(path, column), default_country_code).dropna()
+
+    def sources(self) -> list:
+        return list(self.manifest.get("sources", {}))
+
+    def sync(self, sources=(), default_country_code: str = "") -> dict:
+        """
+        Import the given CSV/XLSX opt-out lists and refresh previously
+        imported ones whose file changed. Unchanged lists are not re-read;
+        a list whose file is missing keeps its numbers. Nothing is removed
+        because a list was not passed: see remove_source().
+        Returns {"added": n, "rebuilt": bool, "count": n}.
+        """
+        def fingerprint(path):
+            st = os.stat(path)
+            return {"size": st.st_size, "mtime": st.st_mtime, "cc": default_country_code}
+
+        known = dict(self.manifest.get("sources", {}))
+        wanted = [str(Path(s).resolve()) for s in sources or ()]
+        changed = {}
+        for source in dict.fromkeys(wanted + list(known)):
+            if not os.path.exists(source):
+                continue
+            fp = fingerprint(source)
+            old = known.get(source)
+            # A known list keeps the country code it was imported with
+            if old is not None:
+                fp["cc"] = old.get("cc", "")
+                if old == fp:
+                    continue
+            changed[source] = fp
+        if not changed:
+            return {"added": 0, "rebuilt": False, "count": len(self)}
+
+        arrays = {
+            source: _to_uint64(self._read_source(source, fp["cc"]))
+            for source, fp in changed.items()
+        }
+        with self._lock:
+            before = len(self)
+            for source, arr in arrays.items():
+                _save_array(self._source_file(source), arr)
+                self.manifest.setdefault("sources", {})[source] = changed[source]
+            self._rebuild()
+            return {"added": len(self) - before, "rebuilt": True, "count": len(self)}
+
+    def remove_source(self, source) -> int:
+        """
+        Stop suppressing the numbers of one imported list (manual opt-outs
+        and other lists are kept). Returns the new total.
+        """
+        if source not in self.sources():
+            source = str(Path(source).resolve())
+        with self._lock:
+            if self.manifest.get("sources", {}).pop(source, None) is None:
+                raise ValueError(f"Not an imported opt-out list: {source}")
+            path = self._source_file(source)
+            if path.exists():
+                os.remove(path)
+            self._rebuild()
+            return len(self)
+
+    # ---- lookups ----
+
+    def __len__(self):
+        return len(self.numbers) + len(self.delta)
+
+    def _in_bloom(self, x: int) -> bool:
+        bloom = self.bloom
+        m = len(bloom) * 8
+        h1 = _mix(x)
+        h2 = _mix(h1) | 1
+        for i in range(self.bloom_k):
+            pos = ((h1 + i * h2) & _MASK64) % m
+            if not bloom[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def _in_numbers(self, x: int) -> bool:
+        import numpy as np
+
+        numbers = self.numbers
+        i = int(np.searchsorted(numbers, np.uint64(x)))
+        return i < len(numbers) and int(numbers[i]) == x
+
+    def contains(self, phone: str) -> bool:
+        """
+        Single normalized number (as from phones.normalize_phone).
+        """
+        if not phone:
+            return False
+        x = int(phone)
+        with self._lock:
+            if x in self.delta:
+                return True
+            return self._in_bloom(x) and self._in_numbers(x)
+
+    def mask(self, phones) -> list:
+        """
+        Vectorized check of a normalized phone list (None allowed);
+        returns a list of bools, True = suppressed.
+        """
+        import numpy as np
+
+        values = np.array([int(p) if p else 0 for p in phones], dtype=np.uint64)
+        with self._lock:
+            numbers = self.numbers
+            if len(numbers):
+                idx = np.searchsorted(numbers, values)
+                idx[idx >= len(numbers)] = 0
+                hit = np.asarray(numbers)[idx] == values
+            else:
+                hit = np.zeros(len(values), dtype=bool)
+            if self.delta:
+                hit |= np.isin(values, np.array(list(self.delta), dtype=np.uint64))
+        hit &= values != 0
+        return hit.tolist()
+
+    # ---- manual opt-outs ----
+
+    def add_opt_out(self, raw, default_country_code: str = "") -> str:
+        """
+        Suppress one number immediately and permanently (durable before
+        returning). Returns the normalized number; ValueError if it is not
+        valid.
+        """
+        phone = normalize_phone(raw, default_country_code)
+        if phone is None:
+            if needs_country_code(raw, default_country_code):
+                raise ValueError(f"{raw!r} needs a country code (write it with '+')")
+            raise ValueError(f"Not a valid phone number: {raw!r}")
+        x = int(phone)
+        with self._lock:
+            # Recorded even if a list already has it: lists can be removed
+            with open(self.folder / _MANUAL, "a", encoding="utf-8") as f:
+                f.write(f"{phone}\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.manual_count += 1
+            if not (self._in_bloom(x) and self._in_numbers(x)):
+                self.delta.add(x)
+            grow = len(self.delta) >= COMPACT_EVERY
+        if grow:
+            self.compact()
+        return phone
+
+    def describe(self) -> str:
+        sources = self.manifest.get("sources", {})
+        return (
+            f"Suppression list: {len(self)} numbers from {len(sources)} list(s)"
+            + (f", {self.manual_count} entered by hand" if self.manual_count else "")
+        )
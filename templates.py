@@ -0,0 +1,166 @@
+import re
+from functools import lru_cache
+
+# {{ column }}, {{ column | default:there }}, {{ column | title | default:Sir }}
+PLACEHOLDER_RE = re.compile(r"\{\{\s*(.*?)\s*\}\}", re.DOTALL)
+
+# filter name -> (per-value function, pandas .str method name)
+FILTERS = {
+    "upper": (str.upper, "upper"),
+    "lower": (str.lower, "lower"),
+    "title": (str.title, "title"),
+    "capitalize": (str.capitalize, "capitalize"),
+    "strip": (str.strip, "strip"),
+    "first": (lambda v: v.split()[0] if v.split() else "", None),
+}
+
+
+class TemplateError(ValueError):
+    pass
+
+
+class Placeholder:
+    """
+    One {{...}} slot: the column to read, an optional default used when the
+    cell is empty or the column is absent, and filters applied in order.
+    """
+
+    __slots__ = ("column", "default", "filters")
+
+    def __init__(self, column: str, default, filters: tuple):
+        self.column = column
+        self.default = default
+        self.filters = filters
+
+    def render(self, row: dict) -> str:
+        value = row.get(self.column)
+        value = "" if value is None else str(value).strip()
+        if not value:
+            value = self.default or ""
+        for name in self.filters:
+            value = FILTERS[name][0](value)
+        return value
+
+
+def _parse_placeholder(expr: str) -> Placeholder:
+    parts = [p.strip() for p in expr.split("|")]
+    column = parts[0].lower()
+    if not column:
+        raise TemplateError("Empty placeholder {{}} in template")
+
+    default = None
+    filters = []
+    for part in parts[1:]:
+        name, sep, arg = part.partition(":")
+        name = name.strip().lower()
+        if name == "default":
+            default = arg.strip() if sep else ""
+        elif name in FILTERS:
+            filters.append(name)
+        else:
+            raise TemplateError(
+                f"Unknown filter '{name}' in {{{{{expr}}}}}. "
+                f"Available: default, {', '.join(FILTERS)}"
+            )
+    return Placeholder(column, default, tuple(filters))
+
+
+class CompiledTemplate:
+    """
+    Template pre-split into literal strings and Placeholder slots.
+    Rendering is a join over the segments; the text is never re-scanned.
+    """
+
+    def __init__(self, source: str, segments: tuple):
+        self.source = source
+        self.segments = segments
+        self.placeholders = tuple(s for s in segments if isinstance(s, Placeholder))
+
+    @property
+    def columns(self) -> set:
+        return {p.column for p in self.placeholders}
+
+    def missing_columns(self, available) -> list:
+        """
+        Columns used without a default that are not in `available`.
+        """
+        available = {c.lower() for c in available}
+        return sorted(
+            {
+                p.column
+                for p in self.placeholders
+                if p.column not in available and p.default is None
+            }
+        )
+
+    def render(self, row: dict) -> str:
+        return "".join(
+            s if isinstance(s, str) else s.render(row) for s in self.segments
+        )
+
+    def render_frame(self, df):
+        """
+        Render every row of a DataFrame in one vectorized pass.
+        Returns a Series of messages aligned with df.index.
+        """
+        import pandas as pd
+
+        out = pd.Series("", index=df.index, dtype=object)
+        for seg in self.segments:
+            if isinstance(seg, str):
+                out = out + seg
+                continue
+
+            if seg.column in df.columns:
+                col = df[seg.column].astype(object).where(df[seg.column].notna(), "")
+                col = col.astype(str).str.strip()
+            else:
+                col = pd.Series("", index=df.index, dtype=object)
+
+            if seg.default:
+                col = col.mask(col == "", seg.default)
+            for name in seg.filters:
+                func, str_method = FILTERS[name]
+                if str_method:
+                    col = getattr(col.str, str_method)()
+                else:
+                    col = col.map(func)
+            out = out + col
+        return out
+
+
+@lru_cache(maxsize=1024)
+def compile_template(text: str) -> CompiledTemplate:
+    """
+    Parse a template once. Cached, so per-row templates from the `message`
+    column are compiled only once per distinct text.
+    """
+    text = text or ""
+    segments = []
+    pos = 0
+    for m in PLACEHOLDER_RE.finditer(text):
+        if m.start() > pos:
+            segments.append(text[pos:m.start()])
+        segments.append(_parse_placeholder(m.group(1)))
+        pos = m.end()
+    if pos < len(text):
+        segments.append(text[pos:])
+    return CompiledTemplate(text, tuple(segments))
+
+
+def render_messages(df, template: CompiledTemplate, message_column: str = "message"):
+    """
+    Vectorized render of all rows. Rows with a non-empty `message_column`
+    use that text as their own template; rows sharing the same custom text
+    are rendered together.
+    """
+    out = template.render_frame(df)
+    if message_column not in df.columns:
+        return out
+
+    custom = df[message_column].astype(object).where(df[message_column].notna(), "")
+    custom = custom.astype(str).str.strip()
+    has_custom = custom != ""
+    for text, idx in custom[has_custom].groupby(custom[has_custom]).groups.items():
+        out.loc[idx] = compile_template(text).render_frame(df.loc[idx])
+    return out
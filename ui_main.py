@@ -1,6 +1,7 @@
 from PySide6.QtWidgets import (
     QWidget, QPushButton, QLabel, QProgressBar, QLineEdit,
-    QFileDialog, QTextEdit, QVBoxLayout, QHBoxLayout, QSpinBox, QCheckBox
+    QFileDialog, QPlainTextEdit, QVBoxLayout, QHBoxLayout, QSpinBox, QCheckBox,
+    QListWidget
 )
 from PySide6.QtGui import QIcon
 
@@ -12,13 +13,13 @@ class Ui_MainWindow(QWidget):
         layout = QVBoxLayout()
 
         # file selectors
-        self.contacts_btn = QPushButton("Select Contacts Excel (.xlsx)")
+        self.contacts_btn = QPushButton("Select Contacts (.xlsx / .csv / .parquet)")
         self.contacts_lbl = QLabel("No file selected")
 
         self.message_btn = QPushButton("Select Message template (.txt)")
         self.message_lbl = QLabel("No file selected")
 
-        self.image_btn = QPushButton("Select Image to send")
+        self.image_btn = QPushButton("Select Attachments (images, video, PDF)")
         self.image_lbl = QLabel("No file selected")
 
         layout.addWidget(self.contacts_btn)
@@ -42,8 +43,23 @@ class Ui_MainWindow(QWidget):
         self.pause_max = QSpinBox()
         self.pause_max.setRange(10, 1200)
         self.pause_max.setValue(180)
+        self.country_code_input = QLineEdit()
+        self.country_code_input.setPlaceholderText("e.g. 91")
+        self.country_code_input.setMaximumWidth(60)
         self.resume_chk = QCheckBox("Resume where left off")
         self.resume_chk.setChecked(True)
+        self.skip_delivered_chk = QCheckBox("Skip numbers already messaged")
+        self.skip_delivered_chk.setChecked(True)
+        self.profile_chk = QCheckBox("Keep WhatsApp logged in (reuse browser profile)")
+        self.profile_chk.setChecked(True)
+        self.profile_btn = QPushButton("Profile folder...")
+        self.profile_lbl = QLabel("browser-profile")
+        self.opt_out_input = QLineEdit()
+        self.opt_out_input.setPlaceholderText("Number that asked not to be contacted")
+        self.opt_out_btn = QPushButton("Add opt-out")
+        self.opt_out_lists_btn = QPushButton("Opt-out lists...")
+        self.opt_out_remove_btn = QPushButton("Remove list...")
+        self.opt_out_lbl = QLabel("No opt-out lists")
 
         control_row.addWidget(QLabel("Daily limit"))
         control_row.addWidget(self.limit_input)
@@ -53,27 +69,67 @@ class Ui_MainWindow(QWidget):
         control_row.addWidget(self.pause_min)
         control_row.addWidget(QLabel("Pause max (s)"))
         control_row.addWidget(self.pause_max)
+        control_row.addWidget(QLabel("Country code"))
+        control_row.addWidget(self.country_code_input)
         layout.addLayout(control_row)
         layout.addWidget(self.resume_chk)
+        layout.addWidget(self.skip_delivered_chk)
+        profile_row = QHBoxLayout()
+        profile_row.addWidget(self.profile_chk)
+        profile_row.addWidget(self.profile_btn)
+        profile_row.addWidget(self.profile_lbl)
+        layout.addLayout(profile_row)
+        opt_out_row = QHBoxLayout()
+        opt_out_row.addWidget(self.opt_out_input)
+        opt_out_row.addWidget(self.opt_out_btn)
+        opt_out_row.addWidget(self.opt_out_lists_btn)
+        opt_out_row.addWidget(self.opt_out_remove_btn)
+        opt_out_row.addWidget(self.opt_out_lbl)
+        layout.addLayout(opt_out_row)
+
+        # campaign queue
+        self.queue_list = QListWidget()
+        self.queue_list.setMaximumHeight(90)
+        self.window_input = QLineEdit("09:00-18:00")
+        self.window_input.setMaximumWidth(100)
+        self.queue_add_btn = QPushButton("Add to queue")
+        self.queue_remove_btn = QPushButton("Remove")
+        self.queue_run_btn = QPushButton("RUN QUEUE")
+        queue_row = QHBoxLayout()
+        queue_row.addWidget(QLabel("Sending hours"))
+        queue_row.addWidget(self.window_input)
+        queue_row.addWidget(self.queue_add_btn)
+        queue_row.addWidget(self.queue_remove_btn)
+        queue_row.addWidget(self.queue_run_btn)
+        layout.addWidget(QLabel("Campaign queue:"))
+        layout.addWidget(self.queue_list)
+        layout.addLayout(queue_row)
 
         # start/stop buttons
         btn_row = QHBoxLayout()
         self.start_btn = QPushButton("START SENDING")
         self.stop_btn = QPushButton("STOP")
         self.stop_btn.setEnabled(False)
+        self.pause_btn = QPushButton("PAUSE")
+        self.pause_btn.setEnabled(False)
         btn_row.addWidget(self.start_btn)
+        btn_row.addWidget(self.pause_btn)
         btn_row.addWidget(self.stop_btn)
         layout.addLayout(btn_row)
 
         # progress and logs
         self.progress = QProgressBar()
         self.progress.setValue(0)
-        self.log = QTextEdit()
+        # Bounded view; the full log goes to sender.log (see qt_reporter)
+        self.log = QPlainTextEdit()
         self.log.setReadOnly(True)
+        self.log.setMaximumBlockCount(5000)
         self.status_lbl = QLabel("Idle")
+        self.metrics_lbl = QLabel("")
 
         layout.addWidget(QLabel("Progress:"))
         layout.addWidget(self.progress)
+        layout.addWidget(self.metrics_lbl)
         layout.addWidget(QLabel("Log:"))
         layout.addWidget(self.log)
         layout.addWidget(self.status_lbl)